@@ -0,0 +1,157 @@
+import os
+import sys
+import argparse
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+
+from core._1_loader import write_chunks
+
+FIRST_NAMES = ['Laura', 'Amanda', 'John', 'Erin', 'Samantha', 'Corey', 'Marcus', 'Michael', 'Tami', 'Priya',
+               'Diego', 'Mei', 'Olu', 'Hanna', 'Ravi', 'Sofia']
+LAST_NAMES = ['Graham', 'Lee', 'Carter', 'Reed', 'Fernandez', 'Bowman', 'Hall', 'Fuller', 'Duncan', 'Savage',
+              'Okafor', 'Novak', 'Silva', 'Chen', 'Kowalski', 'Nair']
+DEPARTMENTS = [' HR ', 'HR     ', 'Finance', ' Finance', 'FinanCE', 'Marketing', 'MarkeTING  ', '   IT  ', 'IT']
+CITIES = ['ChicaGO', 'Chicago', 'miami', 'Miami', 'NEW York', 'New     York', 'BoSton', 'BostOn', 'Houston']
+BOOLEANS = ['YeS', 'yes', 'NO', 'no', 'True', 'False', '0', '1']
+
+# Rates of the whole-row pathologies of messy_data.csv
+EMPTY_ROW_RATE = 0.05
+DUPLICATE_ROW_RATE = 0.05
+MISSING_RATE = 0.15
+
+
+def _blank(values: np.ndarray, rng, rate: float = MISSING_RATE) -> np.ndarray:
+    """Replace a share of the values with empty cells."""
+    values = values.astype(object)
+    values[rng.random(len(values)) < rate] = None
+    return values
+
+
+def _pick(options, rng, rows: int) -> np.ndarray:
+    return np.asarray(options, dtype=object)[rng.integers(0, len(options), rows)]
+
+
+def _names(rng, rows: int) -> np.ndarray:
+    return _blank(_pick(FIRST_NAMES, rng, rows) + ' ' + _pick(LAST_NAMES, rng, rows), rng, 0.05)
+
+
+def _ages(rng, rows: int) -> np.ndarray:
+    return _blank(rng.integers(18, 70, rows), rng)
+
+
+def _salaries(rng, rows: int) -> np.ndarray:
+    """Salaries written as 75000%, 126784$, $105856 or plain numbers."""
+    amounts = rng.integers(30000, 150000, rows).astype(str).astype(object)
+    layout = rng.integers(0, 4, rows)
+    amounts[layout == 1] = amounts[layout == 1] + '%'
+    amounts[layout == 2] = amounts[layout == 2] + '$'
+    amounts[layout == 3] = '$' + amounts[layout == 3]
+    return _blank(amounts, rng)
+
+
+def _dates(rng, rows: int) -> np.ndarray:
+    """Day-first dates, two-digit years, mixing '-' and '/' separators."""
+    day = pd.Series(rng.integers(1, 29, rows)).astype(str).str.zfill(2)
+    month = pd.Series(rng.integers(1, 13, rows)).astype(str).str.zfill(2)
+    year = pd.Series(rng.integers(20, 25, rows)).astype(str)
+    separator = pd.Series(_pick(['-', '/'], rng, rows))
+    return _blank((day + separator + month + separator + year).to_numpy(), rng, 0.3)
+
+
+def _times(rng, rows: int) -> np.ndarray:
+    seconds = pd.to_timedelta(rng.integers(0, 24 * 3600, rows), unit='s')
+    times = pd.Series(seconds).astype(str).str[-8:]
+    return _blank(times.to_numpy(), rng, 0.3)
+
+
+def _ratings(rng, rows: int) -> np.ndarray:
+    return _blank(np.round(rng.uniform(1, 6, rows), 1), rng, 0.3)
+
+
+def _coordinates(low: float, high: float):
+    def generate(rng, rows: int) -> np.ndarray:
+        return _blank(np.round(rng.uniform(low, high, rows), 4), rng, 0.3)
+    return generate
+
+
+def _currencies(rng, rows: int) -> np.ndarray:
+    """Amounts written as '145 $ USD', '$ 245 USD', '4355% USD' or '$ %3664 USD'."""
+    amounts = rng.integers(100, 50000, rows).astype(str).astype(object)
+    layout = rng.integers(0, 4, rows)
+    amounts[layout == 0] = amounts[layout == 0] + ' $ USD'
+    amounts[layout == 1] = '$ ' + amounts[layout == 1] + ' USD'
+    amounts[layout == 2] = amounts[layout == 2] + '% USD'
+    amounts[layout == 3] = '$ %' + amounts[layout == 3] + ' USD'
+    return _blank(amounts, rng, 0.1)
+
+
+def _empty(rng, rows: int) -> np.ndarray:
+    return np.full(rows, None, dtype=object)
+
+
+# The columns of messy_data.csv, with their junk names, in order
+COLUMNS = [
+    ('Name', _names),
+    ('AGE  **', _ages),
+    ('Salary %', _salaries),
+    ('trasher', _empty),
+    ('DepartMENT', lambda rng, rows: _blank(_pick(DEPARTMENTS, rng, rows), rng, 0.1)),
+    ('City  ', lambda rng, rows: _blank(_pick(CITIES, rng, rows), rng, 0.1)),
+    ('Last PurchaSE ', _dates),
+    ('Purchase TIME', _times),
+    ('moved  ', _empty),
+    ('^^^ StAtus ', lambda rng, rows: _blank(_pick(BOOLEANS, rng, rows), rng, 0.05)),
+    ('RaTIng ', _ratings),
+    ('LatiTUde', _coordinates(25.0, 48.0)),
+    ('LongItude', _coordinates(-122.0, -70.0)),
+    ('$ CurrencY $', _currencies),
+]
+
+
+def generate_messy_data(rows: int, width: int = len(COLUMNS), seed: int = 0, start_id: int = 1) -> pd.DataFrame:
+    """A frame with the pathologies of messy_data.csv: junk column names, mixed date and
+    currency formats, yes/no booleans, stray whitespace and case, empty columns, fully
+    empty rows and duplicated rows. `width` columns follow the C_ID column; past the 14
+    of the original they repeat its column kinds under new junk names."""
+    rng = np.random.default_rng(seed)
+    data = {'C_ID': np.arange(start_id, start_id + rows)}
+    for i in range(width):
+        name, generate = COLUMNS[i % len(COLUMNS)]
+        data[name if i < len(COLUMNS) else f"{name.strip()} ##{i // len(COLUMNS)} "] = generate(rng, rows)
+    frame = pd.DataFrame(data)
+
+    # Duplicates copy an earlier row except its id; empty rows keep only the id
+    duplicates = np.flatnonzero(rng.random(rows) < DUPLICATE_ROW_RATE)
+    duplicates = duplicates[duplicates > 0]
+    sources = rng.integers(0, duplicates, len(duplicates)) if len(duplicates) else duplicates
+    frame.iloc[duplicates, 1:] = frame.iloc[sources, 1:].to_numpy()
+    empty = rng.random(rows) < EMPTY_ROW_RATE
+    frame.iloc[np.flatnonzero(empty), 1:] = None
+    return frame
+
+
+def write_messy_data(file_path: str, rows: int, width: int = len(COLUMNS), seed: int = 0,
+                     chunk_rows: int = 1_000_000) -> str:
+    """Write a generated dataset of any size chunk by chunk, in the format of the extension."""
+    def chunks():
+        for i, start in enumerate(range(0, rows, chunk_rows)):
+            yield generate_messy_data(min(chunk_rows, rows - start), width, seed + i, start_id=start + 1)
+    write_chunks(chunks(), file_path)
+    return file_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic messy dataset.")
+    parser.add_argument('output', help="output file (.csv, .json, .parquet, .feather or .arrow)")
+    parser.add_argument('--rows', type=int, default=10_000)
+    parser.add_argument('--width', type=int, default=len(COLUMNS))
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    write_messy_data(args.output, args.rows, args.width, args.seed)
+    print(f"Wrote {args.rows} rows x {args.width + 1} columns to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
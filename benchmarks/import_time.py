@@ -0,0 +1,79 @@
+"""Check that the pipeline modules import within a time budget.
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --budget 0.5 --modules core methods.batch_inject
+
+Each module is imported in a fresh interpreter under `python -X importtime`. The check
+fails (exit status 1) when an import takes longer than --budget seconds or loads one of
+HEAVY_MODULES, which only the functions that need them may import. The slowest imports
+are listed to show where the time goes.
+"""
+import os
+import sys
+import argparse
+import subprocess
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+DEFAULT_BUDGET = 0.5  # seconds, for a short-lived worker's imports
+MODULES = ['core', 'core._1_loader', 'core._2_detector', 'core._3_cleaner', 'core._4_standardizer',
+           'core._5_outlier_handler', 'core._6_filler', 'core._7_dtype_handler', 'core._8_feature_selector',
+           'core._9_encoder', 'core._10_scaler', 'core._11_resampler', 'core._12_validator', 'core.pipeline',
+           'methods.batch_inject']
+HEAVY_MODULES = ['matplotlib', 'seaborn', 'sklearn', 'scipy', 'xgboost', 'imblearn', 'tkinter']
+
+_PROBE = "import sys, {module}; print(','.join(m for m in {heavy!r} if m in sys.modules))"
+
+
+def measure_import(module: str) -> dict:
+    """Import `module` in a fresh interpreter and return its total import time, the heavy
+    modules it loaded and its imports by cumulative time, slowest first."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', _PROBE.format(module=module, heavy=HEAVY_MODULES)],
+                            cwd=ROOT, capture_output=True, text=True)
+    if result.returncode:
+        return {'module': module, 'error': result.stderr.strip().splitlines()[-1]}
+
+    imports = []
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        imports.append((name[1:].rstrip(), int(cumulative) / 1e6))  # nested imports are indented
+    top_level = [seconds for name, seconds in imports if not name.startswith(' ')]
+    return {'module': module, 'seconds': sum(top_level), 'error': None,
+            'heavy': [name for name in result.stdout.strip().split(',') if name],
+            'imports': sorted(imports, key=lambda item: item[1], reverse=True)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the import time of the pipeline modules.")
+    parser.add_argument('--modules', nargs='+', default=MODULES)
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET, help="seconds allowed per module")
+    parser.add_argument('--top', type=int, default=5, help="slowest imports listed per module")
+    args = parser.parse_args()
+
+    failures = []
+    for module in args.modules:
+        measured = measure_import(module)
+        if measured['error']:
+            print(f"{module:<26} ❌ {measured['error']}")
+            failures.append(module)
+            continue
+        over = measured['seconds'] > args.budget
+        status = '❌' if over or measured['heavy'] else '✅'
+        print(f"{module:<26} {status} {measured['seconds']:6.3f}s"
+              + (f"  loads {', '.join(measured['heavy'])}" if measured['heavy'] else ''))
+        if status == '❌':
+            failures.append(module)
+            for name, seconds in measured['imports'][:args.top]:
+                print(f"{'':<28}{seconds:6.3f}s {name.strip()}")
+
+    if failures:
+        print(f"❌ {len(failures)} module(s) over the {args.budget}s import budget or loading heavy dependencies")
+        sys.exit(1)
+    print(f"✅ Every module imports within {args.budget}s without heavy dependencies")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""Time each pipeline stage on generated messy datasets and compare with a stored baseline.
+
+    python benchmarks/run_benchmarks.py --rows 10000 100000
+    python benchmarks/run_benchmarks.py --rows 10000 100000 --save-baseline
+
+Each dataset is written with generate_data.py to a temporary file, then run through
+load_file, detection, run_cleaning, format_all, imputation, encoding and scaling, each
+timed with utils/profiler.py. The exit status is 1 when a stage is slower than its
+baseline by more than --tolerance, so the script can gate CI. Baselines are only
+comparable on the machine (and library versions) they were recorded on.
+"""
+import os
+import sys
+import json
+import shutil
+import argparse
+import platform
+import tempfile
+import importlib
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.generate_data import COLUMNS, write_messy_data
+from core._1_loader import load_file, iter_file, write_chunks
+from core._2_detector import datadetector
+from core._3_cleaner import cleaning
+from core._4_standardizer import standardizer
+from utils.profiler import stage_profiler
+
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+DEFAULT_TOLERANCE = 0.25  # allowed slowdown over the baseline before a stage counts as a regression
+MIN_SECONDS = 0.05        # stages faster than this are too noisy to compare
+# Modules the later stages import lazily, with the dependencies their functions import on
+# first use; imported before timing so import time is not counted
+STAGE_MODULES = {'imputation': ['core._6_filler'], 'encoding': ['core._9_encoder', 'sklearn.preprocessing'],
+                 'scaling': ['core._10_scaler', 'sklearn.preprocessing']}
+
+
+def _impute(frame):
+    from core._6_filler import fit_fill_values, transform_fill_values
+    return transform_fill_values(frame, fit_fill_values(frame))
+
+
+def _encode(frame):
+    from core._9_encoder import fit_label_encoders
+    return fit_label_encoders(frame)[0]
+
+
+def _scale(frame):
+    from core._10_scaler import fit_scaler, transform_scaler
+    numeric = frame.select_dtypes(include='number').astype(float)
+    numeric = numeric.fillna(numeric.mean())
+    return transform_scaler(numeric, fit_scaler(numeric))
+
+
+def _stream(file_path, chunksize, output_path):
+    chunks = iter_file(file_path, chunksize=chunksize)
+    chunks = datadetector().detection_chunks(chunks)
+    chunks = cleaning().run_cleaning_chunks(chunks)
+    chunks = standardizer().format_all_chunks(chunks)
+    return write_chunks(chunks, output_path)
+
+
+def run_stages(file_path: str, rows: int, chunksize: int = None) -> list:
+    """Run the pipeline stages in order on a file of `rows` rows and return one result per
+    stage. A stage whose module cannot be imported here is reported as skipped, with the
+    reason. Throughput is counted in input rows for every stage."""
+    skipped = {}
+    for stage, modules in STAGE_MODULES.items():
+        try:
+            for module in modules:
+                importlib.import_module(module)
+        except ImportError as e:
+            skipped[stage] = str(e)
+
+    profiler = stage_profiler()
+    stages = [
+        ('load_file', load_file),
+        ('detection', lambda frame: datadetector().detection(frame)[0]),
+        ('run_cleaning', cleaning().run_cleaning),
+        ('format_all', standardizer().format_all),
+        ('imputation', _impute),
+        ('encoding', _encode),
+        ('scaling', _scale),
+    ]
+    results = [{'stage': stage, 'skipped': reason} for stage, reason in skipped.items()]
+    value = file_path
+    with profiler:
+        for stage, func in stages:
+            if stage in skipped:
+                continue
+            output = profiler.measure(stage, func, (value,), {})
+            if stage != 'scaling':  # scaling returns the numeric features only
+                value = output
+        if chunksize:
+            output_path = os.path.join(os.path.dirname(file_path), 'streamed.parquet')
+            profiler.measure('stream', _stream, (file_path, chunksize, output_path), {})
+
+    report = profiler.report().astype(object)
+    report = report.where(report.notna(), None)
+    for record in report[report['depth'] == 0].to_dict('records'):
+        results.append({
+            'stage': record['stage'],
+            'seconds': record['wall_time'],
+            'cpu_seconds': record['cpu_time'],
+            'rows_per_second': rows / record['wall_time'] if record['wall_time'] else None,
+            'peak_rss_growth': record['peak_rss_growth'],
+            'bytes_out': record['bytes_out'],
+        })
+    order = [stage for stage, _ in stages] + ['stream']
+    return sorted(results, key=lambda result: order.index(result['stage']))
+
+
+def environment() -> dict:
+    return {'python': platform.python_version(), 'pandas': pd.__version__, 'numpy': np.__version__,
+            'machine': platform.machine(), 'cpus': os.cpu_count()}
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Stages slower than their baseline by more than `tolerance`, as readable lines."""
+    regressions = []
+    for key, stages in results.items():
+        for stage, result in stages.items():
+            expected = baseline.get(key, {}).get(stage, {}).get('seconds')
+            seconds = result.get('seconds')
+            if expected is None or seconds is None or max(seconds, expected) < MIN_SECONDS:
+                continue
+            if seconds > expected * (1 + tolerance):
+                regressions.append(f"{key} {stage}: {seconds:.3f}s vs baseline {expected:.3f}s "
+                                   f"(+{seconds / expected - 1:.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline stages on synthetic messy data.")
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000],
+                        help="dataset sizes to run, e.g. 10000 1000000")
+    parser.add_argument('--width', type=int, default=len(COLUMNS), help="columns besides the id")
+    parser.add_argument('--format', default='csv', choices=['csv', 'parquet', 'feather', 'json'])
+    parser.add_argument('--chunksize', type=int, help="also time the streaming path with this chunk size")
+    parser.add_argument('--baseline', default=BASELINE_FILE)
+    parser.add_argument('--save-baseline', action='store_true', help="store these results as the baseline")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument('--output', help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='adcp_bench_')
+    results = {}
+    try:
+        for rows in args.rows:
+            key = f"{rows}x{args.width}"
+            file_path = write_messy_data(os.path.join(work_dir, f"messy_{key}.{args.format}"), rows, args.width)
+            stages = run_stages(file_path, rows, args.chunksize)
+            results[key] = {result.pop('stage'): result for result in stages}
+            for stage, result in results[key].items():
+                if 'skipped' in result:
+                    print(f"{key:>14} {stage:<13} skipped: {result['skipped']}")
+                else:
+                    print(f"{key:>14} {stage:<13} {result['seconds']:9.3f}s {result['rows_per_second'] or 0:14,.0f} rows/s "
+                          f"{(result['peak_rss_growth'] or 0) / 2 ** 20:8.1f} MB peak RSS growth")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            json.dump({'environment': environment(), 'results': results}, handle, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as handle:
+            json.dump({'environment': environment(), 'results': results}, handle, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to record one.")
+        return
+    with open(args.baseline, 'r', encoding='utf-8') as handle:
+        baseline = json.load(handle)
+    if baseline.get('environment') != environment():
+        print(f"⚠️ Baseline was recorded on {baseline.get('environment')}, not {environment()}")
+    regressions = compare(results, baseline['results'], args.tolerance)
+    for line in regressions:
+        print(f"❌ Regression: {line}")
+    if regressions:
+        sys.exit(1)
+    print("✅ No stage slower than the baseline beyond the tolerance")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,10 @@
 
 # Scaler.py
 
-from sklearn.preprocessing import StandardScaler, MinMaxScaler, RobustScaler
+import pandas as pd
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 def fit_scaler(X, scaler_type="standard"):
     """
@@ -14,6 +17,8 @@ def fit_scaler(X, scaler_type="standard"):
     Returns:
     - scaler (object): The fitted scaler
     """
+    from sklearn.preprocessing import StandardScaler, MinMaxScaler, RobustScaler
+
     if scaler_type == "standard":
         scaler = StandardScaler()
     elif scaler_type == "minmax":
@@ -24,7 +29,7 @@ def fit_scaler(X, scaler_type="standard"):
         raise ValueError(f"Unsupported scaler type: {scaler_type}")
     
     scaler.fit(X)
-    print(f"✅ Fitted {scaler_type} scaler")
+    logger.info("✅ Fitted %s scaler", scaler_type)
     return scaler
 
 def transform_scaler(X, scaler):
@@ -40,12 +45,9 @@ def transform_scaler(X, scaler):
     """
     X_scaled = scaler.transform(X)
     X_scaled_df = pd.DataFrame(X_scaled, columns=X.columns)
-    print(f"✅ Scaled features using {scaler.__class__.__name__}")
+    logger.info("✅ Scaled features using %s", scaler.__class__.__name__)
     return X_scaled_df
 
-import matplotlib.pyplot as plt
-import seaborn as sns
-
 def visualize_scaling_effect(X, X_scaled):
     """
     Visualize the effect of scaling on feature distributions using histograms.
@@ -57,6 +59,8 @@ def visualize_scaling_effect(X, X_scaled):
     Returns:
     - None: Plots histograms of the original vs scaled features
     """
+    import matplotlib.pyplot as plt
+
     num_features = X.shape[1]
     
     # Set up subplots
@@ -73,22 +77,7 @@ def visualize_scaling_effect(X, X_scaled):
     
     plt.tight_layout()
     plt.show()
-    print("✅ Visualization of feature distributions before and after scaling.")
-
-# Example usage
-# Assume you have a DataFrame `df` with feature columns
-
-X = df.drop('target', axis=1)  # Features
-y = df['target']  # Target (not scaled)
-
-# Fit scaler (StandardScaler)
-scaler = fit_scaler(X, scaler_type="standard")
-
-# Transform the features using the fitted scaler
-X_scaled = transform_scaler(X, scaler)
-
-# Visualize the effect of scaling
-visualize_scaling_effect(X, X_scaled)
+    logger.info("✅ Visualization of feature distributions before and after scaling.")
 
 # 💡 Notes and Tips:
 # StandardScaler: Subtracts the mean and divides 
@@ -108,5 +97,3 @@ visualize_scaling_effect(X, X_scaled)
 # scaling has worked.
 # This can be very useful when dealing with datasets 
 # that contain highly skewed distributions or outliers.
-
--------------------------------------------------------------
@@ -1,9 +1,13 @@
 # >--Resampler.py--<
 
-from imblearn.over_sampling import SMOTE, RandomOverSampler
-from imblearn.under_sampling import RandomUnderSampler
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 def fit_resampler(strategy="smote", random_state=42, **kwargs):
+    from imblearn.over_sampling import SMOTE, RandomOverSampler
+    from imblearn.under_sampling import RandomUnderSampler
+
     if strategy == "smote":
         resampler = SMOTE(random_state=random_state, **kwargs)
     elif strategy == "random_over":
@@ -13,18 +17,18 @@ def fit_resampler(strategy="smote", random_state=42, **kwargs):
     else:
         raise ValueError(f"Unsupported strategy: {strategy}")
     
-    print(f"✅ Resampler initialized with strategy: {strategy}")
+    logger.info("✅ Resampler initialized with strategy: %s", strategy)
     return resampler
 
 def apply_resampling(X, y, resampler):
     X_res, y_res = resampler.fit_resample(X, y)
-    print(f"🔁 Resampling complete. Original: {len(y)}, Resampled: {len(y_res)}")
+    logger.info("🔁 Resampling complete. Original: %s, Resampled: %s", len(y), len(y_res))
     return X_res, y_res
 
-import matplotlib.pyplot as plt
-import seaborn as sns
-
 def visualize_class_distribution(y_before, y_after=None, labels=("Before", "After")):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
     fig, axes = plt.subplots(1, 2 if y_after is not None else 1, figsize=(12, 5))
 
     if y_after is not None:
@@ -40,20 +44,6 @@ def visualize_class_distribution(y_before, y_after=None, labels=("Before", "Afte
     plt.tight_layout()
     plt.show()
 
-# Sample usage
-from sklearn.model_selection import train_test_split
-
-X = df.drop("target", axis=1)
-y = df["target"]
-
-visualize_class_distribution(y)
-
-resampler = fit_resampler(strategy="smote")
-X_resampled, y_resampled = apply_resampling(X, y, resampler)
-
-visualize_class_distribution(y, y_resampled)
-
-
 #  Extra Tips:
 # Use SMOTE when you have enough 
 # features to synthesize data.
@@ -61,5 +51,3 @@ visualize_class_distribution(y, y_resampled)
 # dataset is small and you want faster results.
 # Use RandomUnderSampler when the majority 
 # class is very large and you're okay dropping some data
-
-------------------------------------------------------------
@@ -1,5 +1,10 @@
 # >--validator.py--<
 
+import numpy as np
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
 def check_final_nans(df):
     """
     Check for missing values (NaN) in the dataset.
@@ -14,9 +19,9 @@ def check_final_nans(df):
     nan_columns = nan_summary[nan_summary > 0]
     
     if not nan_columns.empty:
-        print(f"✅ Columns with missing values (NaNs):\n{nan_columns}")
+        logger.info("✅ Columns with missing values (NaNs):\n%s", nan_columns)
     else:
-        print("✅ No missing values found.")
+        logger.info("✅ No missing values found.")
 
 def check_invalid_types(df):
     """
@@ -31,12 +36,9 @@ def check_invalid_types(df):
     invalid_columns = df.select_dtypes(exclude=['number']).columns
     
     if len(invalid_columns) > 0:
-        print(f"✅ Columns with invalid data types:\n{invalid_columns}")
+        logger.info("✅ Columns with invalid data types:\n%s", invalid_columns)
     else:
-        print("✅ All columns have valid data types.")
-
-import numpy as np
-from scipy import stats
+        logger.info("✅ All columns have valid data types.")
 
 def recheck_outliers(df, method="zscore", threshold=3):
     """
@@ -51,14 +53,15 @@ def recheck_outliers(df, method="zscore", threshold=3):
     - None: Prints out columns with detected outliers
     """
     if method == "zscore":
+        from scipy import stats
         z_scores = np.abs(stats.zscore(df.select_dtypes(include=[np.number])))
         outliers = (z_scores > threshold).sum(axis=0)
         
         outlier_columns = outliers[outliers > 0]
         if len(outlier_columns) > 0:
-            print(f"✅ Columns with Z-score outliers:\n{outlier_columns}")
+            logger.info("✅ Columns with Z-score outliers:\n%s", outlier_columns)
         else:
-            print("✅ No Z-score outliers found.")
+            logger.info("✅ No Z-score outliers found.")
     
     elif method == "iqr":
         Q1 = df.quantile(0.25)
@@ -68,16 +71,13 @@ def recheck_outliers(df, method="zscore", threshold=3):
         
         outlier_columns = outliers[outliers > 0]
         if len(outlier_columns) > 0:
-            print(f"✅ Columns with IQR outliers:\n{outlier_columns}")
+            logger.info("✅ Columns with IQR outliers:\n%s", outlier_columns)
         else:
-            print("✅ No IQR outliers found.")
+            logger.info("✅ No IQR outliers found.")
     
     else:
         raise ValueError("Invalid method. Choose either 'zscore' or 'iqr'.")
 
-import seaborn as sns
-import matplotlib.pyplot as plt
-
 def visualize_data_distribution(df):
     """
     Visualize the distribution of features in the dataset using histograms, KDEs, and boxplots.
@@ -88,6 +88,9 @@ def visualize_data_distribution(df):
     Returns:
     - None: Displays the plots
     """
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
     numeric_columns = df.select_dtypes(include=[np.number]).columns
     
     fig, axes = plt.subplots(nrows=len(numeric_columns), ncols=3, figsize=(15, len(numeric_columns) * 5))
@@ -107,19 +110,4 @@ def visualize_data_distribution(df):
     
     plt.tight_layout()
     plt.show()
-    print("✅ Visualized data distributions using histograms, KDE, and boxplots.")
-
-# Example usage
-# Assume you have a DataFrame `df`
-
-# Check for missing values (NaNs)
-check_final_nans(df)
-
-# Check for invalid data types
-check_invalid_types(df)
-
-# Recheck for outliers using Z-scores
-recheck_outliers(df, method="zscore", threshold=3)
-
-# Visualize the data distribution
-visualize_data_distribution(df)
\ No newline at end of file
+    logger.info("✅ Visualized data distributions using histograms, KDE, and boxplots.")
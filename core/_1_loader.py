@@ -1,24 +1,380 @@
 import os
+import sys
 import pandas as pd
+from utils.logger import get_logger
 
-SUPPORTED_FORMATS = ['.csv', '.json', '.xlsx']
+logger = get_logger(__name__)
 
-def load_file(file_path: str) -> pd.DataFrame:
-    """Load data from a file into a pandas DataFrame."""
-    ext = os.path.splitext(file_path)[1].lower()
+SUPPORTED_FORMATS = ['.csv', '.json', '.xlsx', '.parquet', '.feather', '.arrow']
+ARROW_FORMATS = {'.parquet': 'parquet', '.feather': 'feather', '.arrow': 'feather'}
+DEFAULT_CHUNKSIZE = 100_000
 
-    if ext not in SUPPORTED_FORMATS:
-        raise ValueError(f"Unsupported file format: {ext}")
+def load_file(file_path: str, columns: list = None, filters=None) -> pd.DataFrame:
+    """Load data from a file into a pandas DataFrame.
+
+    `columns` reads only the listed columns. `filters` takes pyarrow DNF predicates
+    (e.g. [('year', '>=', 2023)]) and is only supported for Parquet and Feather/Arrow,
+    where both are pushed down to the reader so skipped columns and row groups are
+    never decoded. Parquet and Feather/Arrow files are memory-mapped."""
+    ext = _check_format(file_path, filters)
+
+    if ext in ARROW_FORMATS:
+        return _read_arrow(file_path, ARROW_FORMATS[ext], columns, filters)
+
+    if ext == '.csv':
+        return pd.read_csv(file_path, usecols=columns)
 
     loaders = {
-        '.csv': pd.read_csv,
         '.json': pd.read_json,
         '.xlsx': pd.read_excel
     }
 
-    return loaders[ext](file_path)
+    dataframe = loaders[ext](file_path)
+    return dataframe[columns] if columns is not None else dataframe
+
+def _check_format(file_path: str, filters=None) -> str:
+    ext = os.path.splitext(file_path)[1].lower()
+
+    if ext not in SUPPORTED_FORMATS:
+        raise ValueError(f"Unsupported file format: {ext}")
+    if filters is not None and ext not in ARROW_FORMATS:
+        raise ValueError(f"Row filters are only supported for Parquet and Feather/Arrow files, not {ext}")
+    return ext
+
+def _filter_expression(filters):
+    if filters is None:
+        return None
+    import pyarrow.parquet as pq
+    return pq.filters_to_expression(filters)
+
+def _read_arrow(file_path: str, file_format: str, columns=None, filters=None) -> pd.DataFrame:
+    if file_format == 'parquet':
+        import pyarrow.parquet as pq
+        table = pq.read_table(file_path, columns=columns, filters=filters, memory_map=True)
+    elif filters is None and not os.path.isdir(file_path):
+        import pyarrow.feather as feather
+        table = feather.read_table(file_path, columns=columns, memory_map=True)
+    else:
+        import pyarrow.dataset as ds
+        table = ds.dataset(file_path, format=file_format).to_table(columns=columns, filter=_filter_expression(filters))
+    return table.to_pandas()
+
+def iter_file(file_path: str, chunksize: int = DEFAULT_CHUNKSIZE, columns: list = None, filters=None):
+    """Stream a file as DataFrame chunks of at most `chunksize` rows.
+
+    CSV uses the pandas chunked reader, JSON must be line-delimited (one record
+    per line), XLSX is read row by row in openpyxl read-only mode and Parquet or
+    Feather/Arrow are scanned batch by batch, so peak memory is bounded by the
+    chunk size rather than the file size. `columns` and `filters` behave as in
+    `load_file`."""
+    ext = _check_format(file_path, filters)
+    if chunksize <= 0:
+        raise ValueError("chunksize must be a positive integer")
+
+    if ext in ARROW_FORMATS:
+        yield from _iter_arrow(file_path, ARROW_FORMATS[ext], chunksize, columns, filters)
+        return
+
+    if ext == '.csv':
+        yield from _iter_csv(file_path, chunksize, columns)
+        return
+
+    streamers = {
+        '.json': _iter_json,
+        '.xlsx': _iter_xlsx
+    }
+
+    for chunk in streamers[ext](file_path, chunksize):
+        yield chunk[columns] if columns is not None else chunk
+
+def _iter_arrow(file_path: str, file_format: str, chunksize: int, columns=None, filters=None):
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(file_path, format=file_format)
+    for batch in dataset.to_batches(columns=columns, filter=_filter_expression(filters), batch_size=chunksize):
+        if batch.num_rows:
+            yield batch.to_pandas()
+
+def _iter_csv(file_path: str, chunksize: int, columns=None):
+    with pd.read_csv(file_path, chunksize=chunksize, usecols=columns) as reader:
+        yield from reader
+
+def _iter_json(file_path: str, chunksize: int):
+    if _first_char(file_path) == '[':
+        # A JSON array cannot be parsed incrementally by pandas; load it once and slice.
+        logger.warning("⚠️ '%s' is not line-delimited JSON, loading it fully before chunking.", file_path)
+        dataframe = pd.read_json(file_path)
+        for start in range(0, len(dataframe), chunksize):
+            yield dataframe.iloc[start:start + chunksize].copy()
+        return
+
+    with pd.read_json(file_path, lines=True, chunksize=chunksize) as reader:
+        yield from reader
+
+def _first_char(file_path: str) -> str:
+    """Return the first non-whitespace character of a text file."""
+    with open(file_path, 'r', encoding='utf-8') as handle:
+        while True:
+            block = handle.read(1024)
+            if not block:
+                return ''
+            block = block.lstrip()
+            if block:
+                return block[0]
+
+def _iter_xlsx(file_path: str, chunksize: int):
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        buffer = []
+        for row in rows:
+            buffer.append(row)
+            if len(buffer) == chunksize:
+                yield pd.DataFrame(buffer, columns=header)
+                buffer = []
+        if buffer:
+            yield pd.DataFrame(buffer, columns=header)
+    finally:
+        workbook.close()
+
+def save_file(dataframe: pd.DataFrame, file_path: str) -> str:
+    """Save a DataFrame to any supported format, chosen by extension.
+
+    Parquet and Feather/Arrow keep dtypes and reload with `load_file` as a
+    memory-mapped read instead of a full text re-parse."""
+    ext = _check_format(file_path)
+
+    if ext == '.parquet':
+        dataframe.to_parquet(file_path, index=False)
+    elif ext in ARROW_FORMATS:
+        dataframe.reset_index(drop=True).to_feather(file_path)
+    elif ext == '.csv':
+        dataframe.to_csv(file_path, index=False)
+    elif ext == '.json':
+        dataframe.to_json(file_path, orient='records', date_format='iso')
+    else:
+        dataframe.to_excel(file_path, index=False)
+    return file_path
+
+def write_chunks(chunks, file_path: str, append: bool = False) -> int:
+    """Write an iterator of DataFrame chunks to a single file as they arrive.
+
+    Only one chunk is held in memory at a time. JSON output is line-delimited
+    so it can be streamed back with `iter_file`; Parquet and Feather/Arrow take
+    their schema from the first chunk. Returns the number of rows written.
+
+    With `append`, CSV and JSON rows are added to the end of an existing file
+    (CSV chunks are aligned to its header) and Parquet or Feather/Arrow output
+    becomes a dataset directory that gains one part file per call, which
+    `load_file` and `iter_file` read back as a whole. XLSX cannot be appended to."""
+    ext = _check_format(file_path)
+
+    if ext in ARROW_FORMATS:
+        if append:
+            file_path = _next_part_path(file_path, ext)
+        return _write_arrow_chunks(chunks, file_path, ARROW_FORMATS[ext])
+    if ext == '.xlsx':
+        if append:
+            raise ValueError("Appending is not supported for .xlsx output")
+        return _write_xlsx_chunks(chunks, file_path)
+
+    header = None
+    if append and ext == '.csv' and os.path.exists(file_path) and os.path.getsize(file_path):
+        header = list(pd.read_csv(file_path, nrows=0).columns)
+
+    rows_written = 0
+    with open(file_path, 'a' if append else 'w', encoding='utf-8', newline='') as handle:
+        for chunk in chunks:
+            if ext == '.csv':
+                if header is not None:
+                    chunk = chunk.reindex(columns=header)
+                chunk.to_csv(handle, index=False, header=header is None)
+                header = list(chunk.columns)
+            else:
+                records = chunk.to_json(orient='records', lines=True, date_format='iso') if len(chunk) else ''
+                handle.write(records if records.endswith('\n') or not records else records + '\n')
+            rows_written += len(chunk)
+    return rows_written
+
+def _next_part_path(dataset_path: str, ext: str) -> str:
+    if os.path.isfile(dataset_path):
+        raise ValueError(f"Cannot append to '{dataset_path}', appended {ext} output must be a dataset directory")
+    os.makedirs(dataset_path, exist_ok=True)
+    parts = [name for name in os.listdir(dataset_path) if name.startswith('part-')]
+    return os.path.join(dataset_path, f"part-{len(parts):05d}{ext}")
+
+def _write_arrow_chunks(chunks, file_path: str, file_format: str) -> int:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    schema = None
+    rows_written = 0
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+            if writer is None:
+                schema = _chunk_schema(table.schema, file_format)
+                table = table.cast(schema)
+                if file_format == 'parquet':
+                    writer = pq.ParquetWriter(file_path, schema)
+                else:
+                    writer = pa.ipc.new_file(file_path, schema)
+            writer.write_table(table)
+            rows_written += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows_written
+
+def _chunk_schema(schema, file_format: str):
+    """The schema later chunks are written with. Categorical columns get a new dictionary
+    per chunk: Parquet takes that as long as the indices are wide enough for any chunk,
+    while the Arrow IPC file format needs one dictionary, so there they are decoded."""
+    import pyarrow as pa
+
+    fields = []
+    for field in schema:
+        if pa.types.is_dictionary(field.type):
+            field = field.with_type(pa.dictionary(pa.int32(), field.type.value_type) if file_format == 'parquet'
+                                    else field.type.value_type)
+        fields.append(field)
+    return pa.schema(fields, metadata=schema.metadata)
+
+def _write_xlsx_chunks(chunks, file_path: str) -> int:
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    rows_written = 0
+    for i, chunk in enumerate(chunks):
+        if i == 0:
+            sheet.append([str(column) for column in chunk.columns])
+        for row in chunk.astype(object).where(chunk.notna(), None).itertuples(index=False):
+            sheet.append(list(row))
+        rows_written += len(chunk)
+    workbook.save(file_path)
+    return rows_written
 
 def load_from_database(query: str, connection) -> pd.DataFrame:
     """Executes a SQL query and loads the result into a pandas 
     DataFrame using the provided connection."""
-    return pd.read_sql_query(query, connection)
\ No newline at end of file
+    return pd.read_sql_query(query, connection)
+
+# Placeholder for one query parameter by DB-API paramstyle, {position} is its 1-based position
+# and {name} a name not bound yet
+PARAM_PLACEHOLDERS = {'qmark': '?', 'format': '%s', 'pyformat': '%s', 'numeric': ':{position}', 'named': ':{name}'}
+SERVER_SIDE_DRIVERS = ('psycopg2', 'psycopg')
+
+def iter_from_database(query: str, connection, batch_size: int = DEFAULT_CHUNKSIZE, keyset_column: str = None,
+                       params=None):
+    """Stream a SQL query as DataFrame batches of at most `batch_size` rows.
+
+    Rows are fetched with `fetchmany` from a server-side (named) cursor when the
+    driver supports one (psycopg2/psycopg), so the result set stays on the server
+    until fetched; other DB-API drivers such as sqlite3 use a regular cursor and
+    SQLAlchemy connections use stream_results.
+
+    With `keyset_column` set, each batch is instead its own short query,
+    `WHERE key > last_key ORDER BY key LIMIT batch_size` over the original query,
+    which avoids one long-running transaction. The key must be unique and sortable,
+    and keyset mode needs a DB-API connection.
+
+    `params` are bound to the query's placeholders, e.g. as built by `filter_after`."""
+    if batch_size <= 0:
+        raise ValueError("batch_size must be a positive integer")
+
+    if keyset_column is not None:
+        yield from _iter_keyset_pages(query, connection, batch_size, keyset_column, params)
+        return
+
+    if hasattr(connection, 'execution_options'):  # SQLAlchemy engine or connection
+        streaming = connection.execution_options(stream_results=True)
+        yield from pd.read_sql_query(query, streaming, params=params, chunksize=batch_size)
+        return
+
+    cursor = _open_cursor(connection)
+    try:
+        _execute(cursor, query, params)
+        yield from _fetch_batches(cursor, batch_size)
+    finally:
+        cursor.close()
+
+def filter_after(query: str, connection, column: str, value, params=None):
+    """Wrap `query` so it only returns rows whose `column` is greater than `value`.
+
+    Returns the new query and its parameters, with the placeholder written in the
+    connection's paramstyle. `params` already bound by `query` are kept in front, so
+    filters can be stacked, e.g. a keyset page over a watermark filter."""
+    paramstyle = _paramstyle(connection)
+    source = query.strip().rstrip(';')
+    position = len(params or ()) + 1
+    name = f"p{position}"
+    while paramstyle == 'named' and name in (params or {}):
+        name = f"_{name}"
+    placeholder = PARAM_PLACEHOLDERS[paramstyle].format(position=position, name=name)
+    filtered = f"SELECT * FROM ({source}) AS filtered_source WHERE {column} > {placeholder}"
+    if paramstyle == 'named':
+        return filtered, {**(params or {}), name: value}
+    return filtered, (*(params or ()), value)
+
+def _driver_name(connection) -> str:
+    return type(connection).__module__.split('.')[0]
+
+def _paramstyle(connection) -> str:
+    if hasattr(connection, 'execution_options'):  # SQLAlchemy binds :name parameters
+        return 'named'
+    return getattr(sys.modules.get(_driver_name(connection)), 'paramstyle', 'qmark')
+
+def _execute(cursor, query: str, params=None):
+    # psycopg applies %-formatting whenever parameters are passed, even empty ones
+    if params is None:
+        cursor.execute(query)
+    else:
+        cursor.execute(query, params)
+
+def _open_cursor(connection):
+    if _driver_name(connection) in SERVER_SIDE_DRIVERS:
+        return connection.cursor(name='adcp_batches')
+    return connection.cursor()
+
+def _fetch_batches(cursor, batch_size: int):
+    columns = None
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if columns is None and cursor.description is not None:
+            columns = [column[0] for column in cursor.description]
+        if not rows:
+            return
+        yield pd.DataFrame.from_records(rows, columns=columns)
+
+def _iter_keyset_pages(query: str, connection, batch_size: int, keyset_column: str, params=None):
+    last_key = None
+    while True:
+        if last_key is None:
+            page_query, page_params = query.strip().rstrip(';'), params
+        else:
+            page_query, page_params = filter_after(query, connection, keyset_column, last_key, params)
+        page_query = f"SELECT * FROM ({page_query}) AS keyset_source ORDER BY {keyset_column} LIMIT {batch_size}"
+
+        cursor = connection.cursor()
+        try:
+            _execute(cursor, page_query, page_params)
+            batch = next(_fetch_batches(cursor, batch_size), None)
+        finally:
+            cursor.close()
+
+        if batch is None or batch.empty:
+            return
+        # Read the key before yielding, downstream stages may drop the column in place
+        last_key = batch[keyset_column].iloc[-1]
+        last_key = last_key.item() if hasattr(last_key, 'item') else last_key
+        full_page = len(batch) == batch_size
+        yield batch
+        if not full_page:
+            return
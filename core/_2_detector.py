@@ -1,69 +1,363 @@
 import re
-import pandas as pd                
-from dateutil.parser import parse 
+import numpy as np
+import pandas as pd
+from dateutil.parser import parse
+from utils.parallel import map_columns
+from utils.categories import CATEGORY_RATIO, is_low_cardinality, to_category
+from utils.profiler import profiled
+from utils.logger import get_logger, frame_info
+
+logger = get_logger(__name__)
+
+BOOLEAN_VALUES = ['true', 'false', 'yes', 'no', '1', '0']
+TRUE_VALUES = ['true', 'yes', '1']
+PREFIX_SIZE = 64  # values checked before committing to a full pass
+Z_SCORE = 1.96  # 95% Wilson interval used for sample confidence
+
+# Date layouts recognised by shape (after '/' is normalised to '-'), each with the
+# formats tried in order. Day-first formats come before month-first ones.
+DATE_LAYOUTS = [
+    (re.compile(r'^\d{1,2}-\d{1,2}-\d{2}$'), ['%d-%m-%y', '%m-%d-%y']),
+    (re.compile(r'^\d{1,2}-\d{1,2}-\d{4}$'), ['%d-%m-%Y', '%m-%d-%Y']),
+    (re.compile(r'^\d{1,2}-\d{1,2}-\d{4} \d{1,2}:\d{2}(:\d{2})?$'), ['%d-%m-%Y %H:%M:%S', '%d-%m-%Y %H:%M',
+                                                                     '%m-%d-%Y %H:%M:%S', '%m-%d-%Y %H:%M']),
+    (re.compile(r'^\d{4}-\d{1,2}-\d{1,2}([ T]\d{1,2}:\d{2}(:\d{2}(\.\d+)?)?)?$'), ['ISO8601']),
+    (re.compile(r'^\d{1,2}-[A-Za-z]{3}-\d{2}$'), ['%d-%b-%y']),
+    (re.compile(r'^\d{1,2}-[A-Za-z]{3}-\d{4}$'), ['%d-%b-%Y']),
+    (re.compile(r'^\d{1,2}-[A-Za-z]{4,9}-\d{4}$'), ['%d-%B-%Y']),
+]
 
 class datadetector:
-    def __init__(self):
+    def __init__(self, sample_size=None, confidence_threshold=0.95, random_state=0, workers=None, backend='process',
+                 category_ratio=CATEGORY_RATIO):
+        """With sample_size set, column types are inferred from a stratified sample of that
+        many rows (see infer_column_types) instead of scanning every value. With workers
+        set, columns are detected in parallel (see utils/parallel.py). Text columns with at
+        most category_ratio distinct values per row are detected as 'category' and
+        dictionary-encoded (None keeps every text column as 'str')."""
         self.time_pattern = re.compile(r'^\d{2}:\d{2}:\d{2}$')  # HH:MM:SS format
+        self.time_columns = []
+        self.sample_size = sample_size
+        self.confidence_threshold = confidence_threshold
+        self.random_state = random_state
+        self.workers = workers
+        self.backend = backend
+        self.category_ratio = category_ratio
 
+    @profiled
     def detect_time_column(self, dataframe):
         """Detect columns with time format (xx:xx:xx) and typecast them as time-only."""
+        self.time_columns = []
         for column in dataframe.columns:
-            str_values = dataframe[column].dropna().astype(str).str.strip()
-            if str_values.str.match(self.time_pattern).all():
-                dataframe[column] = pd.to_datetime(dataframe[column], format='%H:%M:%S', errors='coerce').dt.time
-                dataframe[column] = dataframe[column].astype('string')  # Ensure dtype is string to avoid showing dates
-                print(f"Column '{column}' detected as time and typecasted to time-only.")
+            uniques = self.normalized_view(dataframe[column])[2]
+            if uniques.str.match(self.time_pattern).all():
+                self.convert_time_column(dataframe, column)
+                self.time_columns.append(column)
+                logger.debug("Column '%s' detected as time and typecasted to time-only.", column)
         return dataframe
 
-    def detect_column_type(self, dataframe, column):
-        """Detect the type of a single column."""
-        str_values = dataframe[column].dropna().astype(str).str.strip()
+    @staticmethod
+    def convert_time_column(dataframe, column):
+        """Typecast a HH:MM:SS column to time-only strings."""
+        dataframe[column] = pd.to_datetime(dataframe[column], format='%H:%M:%S', errors='coerce').dt.time
+        dataframe[column] = dataframe[column].astype('string')  # Ensure dtype is string to avoid showing dates
+
+    @staticmethod
+    def normalized_view(series):
+        """Factorize the non-null values of a column into stripped string uniques.
+
+        Returns (index, codes, uniques): every type check runs once over `uniques` and
+        results are expanded back to the non-null rows at `index` through `codes`."""
+        values = series.dropna()
+        codes, uniques = pd.factorize(values)
+        return values.index, codes, pd.Series(uniques, dtype=object).astype(str).str.strip()
 
+    @staticmethod
+    def _all(uniques, check):
+        """Whether `check` holds for every value, rejecting on a short prefix before a full pass."""
+        if not check(uniques.iloc[:PREFIX_SIZE]).all():
+            return False
+        return len(uniques) <= PREFIX_SIZE or check(uniques.iloc[PREFIX_SIZE:]).all()
+
+    def classify(self, uniques):
+        """Classify stripped string uniques as bool, time, date, int, float or str.
+
+        Returns the type and the converted uniques computed along the way (or None)
+        so they are not parsed twice."""
         # Detect boolean-like strings
-        if str_values.str.lower().isin(['true', 'false', 'yes', 'no', '1', '0']).all():
-            dataframe[column] = str_values.str.lower().map(lambda x: True if x in ['true', 'yes', '1'] else False)
-            return 'bool'
+        if self._all(uniques, lambda values: values.str.lower().isin(BOOLEAN_VALUES)):
+            return 'bool', uniques.str.lower().isin(TRUE_VALUES)
+
+        # Detect HH:MM:SS times
+        if self._all(uniques, lambda values: values.str.match(self.time_pattern)):
+            return 'time', None
 
         # Detect strictly formatted dates
-        if all(any(sep in val for sep in ['-', '/']) and self.is_date(val) for val in str_values):
-            dataframe[column] = pd.to_datetime(dataframe[column], errors='coerce')
-            return 'date'
+        if self._all(uniques, lambda values: values.str.contains(r'[-/]', regex=True)):
+            dates = self.parse_dates(uniques, stop_on_failure=True)
+            if dates is not None:
+                return 'date', dates
 
         # Detect numeric (and separate int vs float)
-        numeric_values = pd.to_numeric(str_values, errors='coerce')
-        if numeric_values.notna().all():
-            if (numeric_values % 1 == 0).all():
-                dataframe[column] = numeric_values.astype('Int64')
-                return 'int'
-            dataframe[column] = numeric_values.astype('float')
-            return 'float'
+        if pd.to_numeric(uniques.iloc[:PREFIX_SIZE], errors='coerce').notna().all():
+            numeric_values = pd.to_numeric(uniques, errors='coerce')
+            if numeric_values.notna().all():
+                return ('int' if (numeric_values % 1 == 0).all() else 'float'), numeric_values
 
         # Fallback to string
-        dataframe[column] = dataframe[column].astype(str)
-        return 'str'
+        return 'str', None
+
+    def parse_dates(self, uniques, stop_on_failure=False, fallback=True):
+        """Parse date strings day-first with one `pd.to_datetime` call per known layout.
+
+        Values matching none of DATE_LAYOUTS fall back to dateutil one by one unless
+        fallback is False. Unparseable values become NaT, or the whole call returns None
+        as soon as one is found when stop_on_failure is set."""
+        normalized = uniques.str.replace('/', '-', regex=False)
+        parsed = pd.Series(pd.NaT, index=uniques.index, dtype='datetime64[ns]')
+
+        for pattern, formats in DATE_LAYOUTS:
+            pending = parsed.isna() & normalized.str.match(pattern)
+            for date_format in formats:
+                if not pending.any():
+                    break
+                parsed[pending] = pd.to_datetime(normalized[pending], format=date_format, errors='coerce').to_numpy()
+                pending &= parsed.isna()
+
+        missing = parsed.isna()
+        if missing.any() and fallback:
+            fallback_dates = []
+            for value in uniques[missing]:
+                fallback_dates.append(self.parse_date(value))
+                if stop_on_failure and fallback_dates[-1] is None:
+                    return None
+            parsed[missing] = pd.to_datetime(pd.Series(fallback_dates, dtype=object), errors='coerce', utc=True) \
+                                .dt.tz_localize(None).to_numpy()
+        elif missing.any() and stop_on_failure:
+            return None
+        return parsed
+
+    def convert(self, uniques, column_type):
+        """Convert stripped string uniques to a detected type (None for time and str columns)."""
+        if column_type == 'bool':
+            lowered = uniques.str.lower()
+            # Values outside BOOLEAN_VALUES become missing rather than False
+            return lowered.isin(TRUE_VALUES).where(lowered.isin(BOOLEAN_VALUES))
+        if column_type == 'date':
+            return self.parse_dates(uniques)
+        if column_type in ('int', 'float'):
+            return pd.to_numeric(uniques, errors='coerce')
+        return None
+
+    def detect_column_type(self, dataframe, column):
+        """Detect the type of a single column."""
+        column_type, values = self.detect_series_type(dataframe[column])
+        self.apply_column_type(dataframe, column, column_type, values=values)
+        return column_type
+
+    def detect_series_type(self, series):
+        """Detect a column's type without touching the frame. Returns (type, values), where
+        values are the converted column for bool, date, numeric and category types and None otherwise."""
+        if series.dropna().empty:
+            return 'unknown', None
+        index, codes, uniques = self.normalized_view(series)
+        column_type, converted = self.classify(uniques)
+        if column_type == 'str' and is_low_cardinality(len(uniques), len(series), self.category_ratio):
+            return 'category', to_category(series)
+        return column_type, self.column_values(series, column_type, (index, codes, uniques), converted)
+
+    def column_values(self, series, column_type, view=None, converted=None):
+        """Convert a bool, date, int, float or category column to its type; None for the other types."""
+        if column_type == 'category':
+            return to_category(series)
+        if column_type not in ('bool', 'date', 'int', 'float'):
+            return None
+
+        index, codes, uniques = view if view is not None else self.normalized_view(series)
+        if converted is None:
+            converted = self.convert(uniques, column_type)
+        values = pd.Series(converted.to_numpy()[codes], index=index)
+
+        if column_type == 'bool':
+            return values.astype('boolean') if values.isna().any() else values.astype(bool)
+        if column_type == 'date':
+            return values
+        if column_type == 'int' and (values.dropna() % 1 == 0).all():
+            return values.astype('Int64')
+        return values.astype('float')
+
+    def apply_column_type(self, dataframe, column, column_type, view=None, converted=None, values=None):
+        """Convert a column in place to a previously detected type."""
+        if column_type == 'unknown':
+            return
+        if column_type == 'time':
+            self.convert_time_column(dataframe, column)
+            dataframe[column] = dataframe[column].astype(str)
+            return
+        if column_type == 'str':
+            dataframe[column] = dataframe[column].astype(str)
+            return
+        if column_type == 'category':
+            # String categories built from the distinct values; unlike 'str', nulls stay null
+            dataframe[column] = values if values is not None else to_category(dataframe[column])
+            return
+
+        dataframe[column] = values if values is not None else \
+            self.column_values(dataframe[column], column_type, view, converted)
 
     @staticmethod
-    def is_date(value):
-        """Check if a value is a valid date."""
+    def parse_date(value):
+        """Parse a single date string with dateutil, returning None if it is not a date."""
         try:
-            parse(value, fuzzy=False, dayfirst=True)
-            return True
+            return parse(value, fuzzy=False, dayfirst=True)
         except Exception:
-            return False
+            return None
+
+    @staticmethod
+    def is_date(value):
+        """Check if a value is a valid date."""
+        return datadetector.parse_date(value) is not None
+
+    def sample_view(self, series, sample_size):
+        """Stratified sample of a column: its first and last rows plus random rows in between.
+
+        Returns the sampled non-null values and whether they cover the whole column."""
+        if len(series) <= sample_size:
+            return series.dropna(), True
+        edge = sample_size // 3
+        rng = np.random.default_rng(self.random_state)
+        middle = rng.integers(edge, len(series) - edge, size=sample_size - 2 * edge)
+        positions = np.unique(np.concatenate([np.arange(edge), middle, np.arange(len(series) - edge, len(series))]))
+        return series.iloc[positions].dropna(), False
+
+    @staticmethod
+    def wilson_lower_bound(matches, total):
+        """Lower bound of the 95% Wilson interval for a share of matches out of total."""
+        if total == 0:
+            return 0.0
+        share = matches / total
+        spread = Z_SCORE * np.sqrt(share * (1 - share) / total + Z_SCORE ** 2 / (4 * total ** 2))
+        return float((share + Z_SCORE ** 2 / (2 * total) - spread) / (1 + Z_SCORE ** 2 / total))
+
+    def score_sample(self, values):
+        """Score sampled values against each candidate type in detection order.
+
+        Returns the first type whose share of conforming values has a Wilson lower bound at
+        or above the confidence threshold, with that bound as its confidence, or (None, best
+        bound) when the sample is ambiguous."""
+        codes, uniques = pd.factorize(values)
+        counts = np.bincount(codes, minlength=len(uniques))
+        uniques = pd.Series(uniques, dtype=object).astype(str).str.strip()
+        total = counts.sum()
 
+        lowered = uniques.str.lower()
+        numeric_values = pd.to_numeric(uniques, errors='coerce')
+        dates = self.parse_dates(uniques, fallback=False)
+        candidates = {
+            'bool': lowered.isin(BOOLEAN_VALUES).to_numpy(),
+            'time': uniques.str.match(self.time_pattern).to_numpy(),
+            'date': (uniques.str.contains(r'[-/]', regex=True) & dates.notna()).to_numpy(),
+            'numeric': numeric_values.notna().to_numpy(),
+        }
+        candidates['str'] = ~np.logical_or.reduce(list(candidates.values()))
+
+        best = 0.0
+        for column_type, matches in candidates.items():
+            confidence = self.wilson_lower_bound(counts[matches].sum(), total)
+            if confidence >= self.confidence_threshold:
+                if column_type == 'numeric':
+                    integral = (numeric_values[matches] % 1 == 0).all()
+                    column_type = 'int' if integral else 'float'
+                return column_type, confidence
+            best = max(best, confidence)
+        return None, best
+
+    def infer_column_type(self, series):
+        """Infer a column's type from a stratified sample, escalating to a full scan when
+        the sample's confidence is below the threshold. Returns (type, confidence)."""
+        values, exhaustive = self.sample_view(series, self.sample_size or len(series))
+        if not exhaustive:
+            column_type, confidence = self.score_sample(values) if not values.empty else (None, 0.0)
+            if column_type is not None:
+                return column_type, confidence
+
+        # Small column or ambiguous sample: scan every value
+        uniques = self.normalized_view(series)[2]
+        if uniques.empty:
+            return 'unknown', 1.0
+        return self.classify(uniques)[0], 1.0
+
+    def verify_inferred_type(self, series, column_type, confidence):
+        """Convert a column to a type inferred from a sample and measure the share of its
+        non-null values that conform; the others become missing. When that share is below
+        the sample's confidence, it becomes the confidence, and a column whose confidence
+        drops below the threshold stays 'str'. Returns (type, confidence, values)."""
+        values = self.column_values(series, column_type)
+        if values is None:
+            return column_type, confidence, None
+        total = series.notna().sum()
+        share = float(values.notna().sum() / total) if total else 1.0
+        if share < confidence:
+            logger.warning("Column '%s': %.2f%% of its values do not conform to the sampled type %s.",
+                           series.name, 100 * (1 - share), column_type)
+            confidence = share
+            if confidence < self.confidence_threshold:
+                return 'str', confidence, None
+        return column_type, confidence, values
+
+    @profiled
+    def infer_column_types(self, dataframe):
+        """Infer {column: (type, confidence)} for every column without converting anything."""
+        return map_columns(self.infer_column_type, dataframe, workers=self.workers, backend=self.backend)
+
+    @profiled
     def detect_column_types(self, dataframe):
         """Detect types for all columns in the dataframe."""
+        if self.sample_size:
+            column_types = {}
+            for column, (column_type, confidence) in self.infer_column_types(dataframe).items():
+                values = None
+                if confidence < 1.0:  # inferred from a sample, the rest of the column is unchecked
+                    column_type, confidence, values = self.verify_inferred_type(dataframe[column], column_type,
+                                                                                confidence)
+                self.apply_column_type(dataframe, column, column_type, values=values)
+                column_types[column] = column_type
+                logger.debug("Column '%s' inferred as %s (confidence %.3f).", column, column_type, confidence)
+            return dataframe, column_types
+
+        # Columns are classified (and converted) independently, possibly in parallel;
+        # results are written back here in column order
         column_types = {}
-        for column in dataframe.columns:
-            if dataframe[column].dropna().empty:
-                column_types[column] = 'unknown'
-            else:
-                column_types[column] = self.detect_column_type(dataframe, column)
+        detected = map_columns(self.detect_series_type, dataframe, workers=self.workers, backend=self.backend)
+        for column, (column_type, values) in detected.items():
+            self.apply_column_type(dataframe, column, column_type, values=values)
+            column_types[column] = column_type
+            if column_type == 'time':
+                logger.debug("Column '%s' detected as time and typecasted to time-only.", column)
         return dataframe, column_types
 
+    @profiled
     def detection(self, dataframe):
-        dataframe = self.detect_time_column(dataframe)
         dataframe, column_types = self.detect_column_types(dataframe)
-        print(dataframe.info())
-        return dataframe, column_types
\ No newline at end of file
+        logger.debug("%s", frame_info(dataframe))
+        return dataframe, column_types
+
+    def detection_chunks(self, chunks, column_types=None):
+        """Detect column types on the first chunk and replay the same conversions
+        on every later chunk, yielding chunks that all share one schema.
+
+        Non-empty `column_types`, e.g. kept from an earlier run, are replayed from the
+        first chunk on instead. An empty dict is filled in with the types detected on
+        the first chunk, so the caller can keep them."""
+        detected = column_types or None
+        for chunk in chunks:
+            if detected is None:
+                chunk, detected = self.detect_column_types(chunk)
+                logger.info("Column types detected on first chunk: %s", detected)
+                if column_types is not None:
+                    column_types.update(detected)
+            else:
+                for column, column_type in detected.items():
+                    if column in chunk.columns:
+                        self.apply_column_type(chunk, column, column_type)
+            yield chunk
@@ -1,64 +1,139 @@
+import numpy as np
 import pandas as pd                      
+from functools import partial
+from utils.parallel import (resolve_workers, map_partitions, split_rows, csv_byte_ranges,
+                            read_csv_range, first_occurrences)
+from utils.dedup import row_deduplicator, column_hashes
+from utils.categories import is_categorical
+from utils.profiler import profiled
+from utils.logger import get_logger
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # optional, speeds up sentinel matching on text columns
+    pa = None
+
+logger = get_logger(__name__)
+
+# Text values treated as empty cells, compared after stripping and lowercasing.
+# 'nan', 'none' and '<na>' also catch nulls that were stringified by astype(str).
+NULL_SENTINELS = ['', 'n/a', 'na', 'null', 'none', 'nan', '<na>', 'nat', '-']
+HASH_PRIME = np.uint64(0x100000001B3)  # FNV-1a prime, folds per-column hashes into row hashes
 
 class cleaning:
+    def __init__(self, null_sentinels=None):
+        self.null_sentinels = NULL_SENTINELS if null_sentinels is None else null_sentinels
+
+    @profiled
     def standardize_empty_cells(self, dataframe: pd.DataFrame):
-        """Standardize all variations of empty cells to pd.NA for consistency."""
-        dataframe = dataframe.applymap(lambda x: pd.NA if pd.isna(x) else x)
-        print("standardize_empty_cells")
+        """Standardize all variations of empty cells to pd.NA for consistency.
+
+        Numeric, boolean and datetime columns keep their native or nullable dtype since
+        NaN/NaT/NA already mark their nulls. Text columns get one vectorized mask of nulls
+        and null sentinels, applied in a single pass; categorical columns just drop their
+        sentinel categories."""
+        for column in dataframe.columns:
+            series = dataframe[column]
+            if is_categorical(series):
+                sentinels = self._sentinel_categories(series)
+                if len(sentinels):
+                    dataframe[column] = series.cat.remove_categories(sentinels)
+                continue
+            if not pd.api.types.is_string_dtype(series.dtype):
+                continue
+            mask = self._empty_cell_mask(series)
+            if mask.any():
+                dataframe[column] = series.mask(mask, pd.NA)
+        logger.debug("standardize_empty_cells")
         return dataframe
 
+    def _empty_cell_mask(self, series: pd.Series) -> np.ndarray:
+        """Boolean mask of the null or sentinel cells of a text column."""
+        if pa is not None:
+            try:
+                values = pa.array(series, from_pandas=True, type=pa.string())
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                values = None  # mixed-type column, handled below
+            if values is not None:
+                normalized = pc.utf8_lower(pc.utf8_trim_whitespace(values))
+                sentinels = pc.is_in(normalized, value_set=pa.array(self.null_sentinels, type=pa.string()))
+                return pc.or_(sentinels, pc.is_null(values)).to_numpy(zero_copy_only=False)
+
+        # Match the sentinels on the factorized unique values only
+        codes, uniques = pd.factorize(series)
+        is_sentinel = pd.Series(uniques, dtype=object).astype(str).str.strip().str.lower() \
+                        .isin(self.null_sentinels).to_numpy()
+        # factorize marks missing values with code -1, which picks the appended True
+        return np.append(is_sentinel, True)[codes]
+
+    def _sentinel_categories(self, series: pd.Series) -> pd.Index:
+        """The categories of a categorical column that are null sentinels."""
+        categories = series.cat.categories
+        normalized = pd.Series(categories, dtype=object).astype(str).str.strip().str.lower()
+        return categories[normalized.isin(self.null_sentinels).to_numpy()]
+
+    @profiled
     def remove_special_characters(self, dataframe: pd.DataFrame):
         """Remove special characters from column names only."""
         dataframe.columns = dataframe.columns.str.replace(r'[^a-zA-Z0-9_]', ' ',  regex=True)
-        print("remove_special_characters_from_columns")
+        logger.debug("remove_special_characters_from_columns")
         return dataframe
 
+    @profiled
     def convert_to_lowercase(self, dataframe: pd.DataFrame):
         """Convert column names to lowercase only."""
         dataframe.columns = dataframe.columns.str.lower()
-        print("convert_column_names_to_lowercase")
+        logger.debug("convert_column_names_to_lowercase")
         return dataframe
 
+    @profiled
     def remove_whitespace(self, dataframe: pd.DataFrame):
         """Remove leading/trailing whitespace from column names only."""
         dataframe.columns = dataframe.columns.str.strip()
-        print("remove_whitespace_from_column_names")
+        logger.debug("remove_whitespace_from_column_names")
         return dataframe
 
+    @profiled
     def replace_space_with_underscore(self, dataframe: pd.DataFrame):
         """Replace spaces with underscores in column names only."""
         dataframe.columns = dataframe.columns.str.replace(' ', '_', regex=False)
-        print("replace_space_with_underscore_in_columns")
+        logger.debug("replace_space_with_underscore_in_columns")
         return dataframe
 
+    @profiled
     def remove_empty_columns(self, dataframe: pd.DataFrame):
         dataframe = dataframe.dropna(axis=1, how='all')
-        print("remove_empty_columns")
+        logger.debug("remove_empty_columns")
         return dataframe
 
+    @profiled
     def remove_empty_rows(self, dataframe: pd.DataFrame):
         """Remove rows where all values are missing, considering all representations of missing values."""
         dataframe = dataframe.loc[~dataframe.isnull().all(axis=1)]
-        print("remove_empty_rows")
+        logger.debug("remove_empty_rows")
         return dataframe
 
-    def identifier_column_remover(self, dataframe: pd.DataFrame):
-        columns_to_drop = []
+    @staticmethod
+    def is_identifier_column(series: pd.Series) -> bool:
+        """Whether a column is an integer column with unique, increasing values."""
+        return pd.api.types.is_integer_dtype(series.dtype) and series.is_unique and series.is_monotonic_increasing
 
-        # Logic to identify integer columns with unique, increasing values
-        for column in dataframe.columns:
-            if dataframe[column].dtype == 'int' and dataframe[column].is_unique and dataframe[column].is_monotonic_increasing:
-                columns_to_drop.append(column)
+    @profiled
+    def identifier_column_remover(self, dataframe: pd.DataFrame):
+        columns_to_drop = [column for column in dataframe.columns if self.is_identifier_column(dataframe[column])]
 
         dataframe = dataframe.drop(columns=columns_to_drop)
-        print("identifier_column_remover")
+        logger.debug("identifier_column_remover")
         return dataframe
 
+    @profiled
     def remove_duplicates(self, dataframe: pd.DataFrame):
         dataframe = dataframe.drop_duplicates().reset_index(drop=True)
-        print("remove_duplicates")
+        logger.debug("remove_duplicates")
         return dataframe
 
+    @profiled
     def run_cleaning(self, dataframe: pd.DataFrame):
         """Apply all cleaning methods in sequence to the DataFrame."""
         dataframe = self.standardize_empty_cells(dataframe)
@@ -70,5 +145,123 @@ class cleaning:
         dataframe = self.remove_empty_columns(dataframe)
         dataframe = self.remove_empty_rows(dataframe)
         dataframe = self.remove_duplicates(dataframe)
-        print("All cleaning methods applied successfully.")
-        return dataframe
\ No newline at end of file
+        logger.info("All cleaning methods applied successfully.")
+        return dataframe
+
+    def run_cleaning_chunks(self, chunks, deduplicator: row_deduplicator = None, columns: list = None):
+        """Apply all cleaning methods to an iterator of DataFrame chunks, yielding each cleaned chunk.
+
+        Identifier and empty columns are decided on the first chunk and the same columns are
+        kept for every later chunk so all chunks share one schema. Non-empty `columns`, e.g.
+        kept from an earlier run, are applied from the first chunk on instead; an empty list
+        is filled in with the columns decided on the first chunk. Duplicates are removed
+        across chunks, not just within each one, by `deduplicator` (by default an in-memory
+        seen-set over whole rows that spills to a temporary directory past its budget); pass
+        one with a state_dir to also skip rows kept by earlier runs, or a subset key."""
+        kept = list(columns) if columns else None
+        own_deduplicator = deduplicator is None
+        deduplicator = deduplicator or row_deduplicator()
+        try:
+            for chunk in chunks:
+                chunk = self.standardize_empty_cells(chunk)
+                chunk = self.remove_special_characters(chunk)
+                chunk = self.convert_to_lowercase(chunk)
+                chunk = self.remove_whitespace(chunk)
+                chunk = self.replace_space_with_underscore(chunk)
+                if kept is None:
+                    chunk = self.identifier_column_remover(chunk)
+                    chunk = self.remove_empty_columns(chunk)
+                    kept = list(chunk.columns)
+                    if columns is not None:
+                        columns.extend(kept)
+                else:
+                    chunk = chunk.reindex(columns=kept)
+                chunk = self.remove_empty_rows(chunk)
+                yield deduplicator.drop_seen(chunk)
+        finally:
+            if own_deduplicator:
+                deduplicator.close()
+        logger.info("All cleaning methods applied successfully.")
+
+    @profiled
+    def run_cleaning_partitioned(self, source, workers=-1, partitions=None):
+        """Apply all cleaning methods to a tall DataFrame, or a CSV file split by byte ranges,
+        with one row partition per worker process.
+
+        Empty cells and column names are cleaned inside the workers, which also return
+        per-column stats and hashes. identifier_column_remover then needs every partition
+        to be unique and increasing with each partition starting above the previous one,
+        remove_empty_columns needs a column to be empty in every partition, and
+        remove_duplicates keeps the first row of each row hash in a hash-partitioned pass.
+        For a DataFrame the result matches run_cleaning; CSV partitions are parsed on their
+        own, so a column's dtype can differ from a single full read."""
+        workers = resolve_workers(workers)
+        partitions = partitions or workers
+        if isinstance(source, pd.DataFrame):
+            tasks = split_rows(source, partitions)
+        else:
+            tasks = [(source, start, end) for start, end in csv_byte_ranges(source, partitions)]
+        if not tasks:
+            return self.run_cleaning(source if isinstance(source, pd.DataFrame) else pd.read_csv(source))
+
+        results = map_partitions(partial(_clean_partition, cleaner=self), tasks, workers)
+        frames, stats, hashes = zip(*results)
+        logger.info("cleaned %s partitions on %s workers", len(tasks), workers)
+
+        column_count = frames[0].shape[1]
+        columns = [i for i in range(column_count)
+                   if not _partitioned_identifier([part[i] for part in stats])
+                   and not all(part[i]['empty'] for part in stats)]
+        logger.debug("identifier_column_remover")
+        logger.debug("remove_empty_columns")
+
+        dataframe = pd.concat(frames, ignore_index=True)
+        nulls = [dataframe.iloc[:, i].isna().to_numpy() for i in columns]
+        empty = np.logical_and.reduce(nulls) if nulls else np.ones(len(dataframe), dtype=bool)
+        rows = np.flatnonzero(~empty)
+        logger.debug("remove_empty_rows")
+
+        row_hashes = np.zeros(len(dataframe), dtype=np.uint64)
+        for i in columns:
+            row_hashes = (row_hashes * HASH_PRIME) ^ np.concatenate([part[i] for part in hashes])
+        rows = rows[first_occurrences(row_hashes[rows], workers)]
+        logger.debug("remove_duplicates")
+
+        dataframe = dataframe.iloc[rows, columns]
+        dataframe.index = pd.RangeIndex(len(dataframe))
+        logger.info("All cleaning methods applied successfully.")
+        return dataframe
+
+
+def _clean_partition(task, cleaner):
+    """Worker side of run_cleaning_partitioned: row-local steps plus the column stats
+    and per-column hashes the global steps are decided from."""
+    dataframe = read_csv_range(*task) if isinstance(task, tuple) else task.copy()
+    dataframe = cleaner.standardize_empty_cells(dataframe)
+    dataframe = cleaner.remove_special_characters(dataframe)
+    dataframe = cleaner.convert_to_lowercase(dataframe)
+    dataframe = cleaner.remove_whitespace(dataframe)
+    dataframe = cleaner.replace_space_with_underscore(dataframe)
+
+    stats, hashes = [], []
+    for i in range(dataframe.shape[1]):
+        series = dataframe.iloc[:, i]
+        values = series.dropna()
+        stats.append({
+            'integer': pd.api.types.is_integer_dtype(series.dtype),
+            'unique': series.is_unique,
+            'monotonic': series.is_monotonic_increasing,
+            'first': values.iloc[0] if len(values) else None,
+            'last': values.iloc[-1] if len(values) else None,
+            'empty': values.empty,
+        })
+        hashes.append(column_hashes(series))
+    return dataframe, stats, hashes
+
+
+def _partitioned_identifier(parts) -> bool:
+    """identifier_column_remover's unique, increasing integer check from per-partition stats."""
+    if not all(part['integer'] and part['unique'] and part['monotonic'] for part in parts):
+        return False
+    filled = [part for part in parts if not part['empty']]
+    return all(previous['last'] < current['first'] for previous, current in zip(filled, filled[1:]))
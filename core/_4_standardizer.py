@@ -1,18 +1,58 @@
+import re
+import numpy as np
 import pandas as pd
+from functools import partial
+from utils.parallel import map_columns, map_partitions, resolve_workers, split_rows
+from utils.categories import is_categorical, map_categories, map_uniques, used_categories
+from utils.profiler import profiled
+from utils.logger import get_logger, frame_info
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # optional, runs the numeric string parser in Arrow's regex engine
+    pa = None
+
+logger = get_logger(__name__)
+
+# Values per column checked for unit tokens before a column is normalized
+UNIT_SAMPLE_SIZE = 1000
+# Symbols allowed between a number's sign and its digits, e.g. "-$1,234"
+CURRENCY_SYMBOLS = '$€£¥₹'
 
 class standardizer:
-    def __init__(self, unit_map=None):
+    def __init__(self, unit_map=None, workers=None, backend='process', decimal='.', thousands=','):
         self.unit_map = unit_map or {
             'kg': [r'\bkilograms?\b', r'\bkgs?\b', r'\bkg\.\b'],
             'usd': [r'\$|usd|us dollars?']
         }
+        # Columns each step applied to on the last run; replayed as-is while frozen
+        # so every chunk of a stream is formatted the same way as the first one.
+        self.column_plan = {}
+        self.frozen = False
+        # Per-column string work can be spread over a pool (see utils/parallel.py)
+        self.workers = workers
+        self.backend = backend
+        # Number format of numeric strings, e.g. decimal=',' and thousands='.' for "1.234,5"
+        self.decimal = decimal
+        self.thousands = thousands
 
+    def _columns(self, step, select):
+        """Return the columns a step applies to, recording them or replaying the frozen plan."""
+        if self.frozen and step in self.column_plan:
+            return self.column_plan[step]
+        self.column_plan[step] = select()
+        return self.column_plan[step]
+
+    @profiled
     def standardize_numerical_format(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         Removes commas, %, $, and converts to proper numeric type if needed.
+        String columns holding digits are parsed with parse_numeric_strings, keeping signs,
+        decimals, thousands separators and exponents; other string columns keep their nulls.
         """
-        numeric_columns = [col for col in df.select_dtypes(include=['int', 'float']).columns]
-        float_columns = [col for col in df.select_dtypes(include=['float']).columns]  # Define float columns
+        numeric_columns = self._columns('numeric', lambda: [col for col in df.select_dtypes(include=['int', 'float']).columns])
+        float_columns = self._columns('float', lambda: [col for col in df.select_dtypes(include=['float']).columns])  # Define float columns
 
         for col in numeric_columns:
             try:
@@ -23,48 +63,48 @@ class standardizer:
                 else:  # Convert other numeric columns to integers
                     df[col] = pd.to_numeric(df[col], errors='coerce').astype('Int64')
             except Exception as e:
-                print(f"Error cleaning numeric format in {col}: {e}")
+                logger.warning("Error cleaning numeric format in %s: %s", col, e)
 
         # Process all string columns to extract numeric values if present
-        string_columns = [col for col in df.select_dtypes(include=['object']).columns]
+        string_columns = self._columns('strings', lambda: [col for col in df.select_dtypes(include=['object', 'category']).columns])
+        if not self.frozen:
+            self.column_plan['numeric_strings'] = {}
+        decisions = self.column_plan['numeric_strings']
 
-        for col in string_columns:
-            try:
-                # Check if the column contains any numeric values
-                if df[col].str.contains(r'\d', regex=True, na=False).any():
-                    # Extract numeric part from string
-                    df[col] = df[col].str.extract(r'(\d+\.\d+|\d+)')[0]
-                    # Convert to float if decimals are present, otherwise to int
-                    df[col] = pd.to_numeric(df[col], errors='coerce')
-                else:
-                    # Leave the column as string if no numeric values are found
-                    df[col] = df[col].astype(str)
-            except Exception as e:
-                print(f"Error processing column {col}: {e}")
+        extract = partial(_extract_numeric_strings, decisions=decisions if self.frozen else {},
+                          decimal=self.decimal, thousands=self.thousands)
+        for col, (contains_digits, values) in map_columns(extract, df, string_columns,
+                                                          workers=self.workers, backend=self.backend).items():
+            if isinstance(values, Exception):
+                logger.warning("Error processing column %s: %s", col, values)
+                continue
+            decisions[col] = contains_digits
+            df[col] = values
 
-        print("standardize_numerical_format ✅")
+        logger.debug("standardize_numerical_format ✅")
         return df
 
+    @profiled
     def standardize_string_format(self, df: pd.DataFrame):
         """
         Trims, lowers, and removes extra spaces from all string columns.
+        Categorical columns are normalized on their categories only.
         """
-        string_columns = [col for col in df.select_dtypes(include=['object']).columns]
+        string_columns = self._columns('string_format', lambda: [col for col in df.select_dtypes(include=['object', 'category']).columns])
 
-        for col in string_columns:
-            df[col] = df[col].astype(str) \
-                             .str.strip() \
-                             .str.lower() \
-                             .str.replace(r'\s+', ' ', regex=True)
-            print(f"🔤 Standardized string format in '{col}'")
+        for col, values in map_columns(_format_strings, df, string_columns,
+                                       workers=self.workers, backend=self.backend).items():
+            df[col] = values
+            logger.debug("🔤 Standardized string format in '%s'", col)
 
         return df
 
+    @profiled
     def standardize_date_format(self, df: pd.DataFrame, output_format: str = "%Y-%m-%d"):
         """
         Standardizes date columns to a uniform format (e.g., YYYY-MM-DD).
         """
-        date_columns = [col for col in df.select_dtypes(include=['datetime']).columns]
+        date_columns = self._columns('date', lambda: [col for col in df.select_dtypes(include=['datetime']).columns])
 
         for col in date_columns:
             try:
@@ -72,40 +112,61 @@ class standardizer:
                 parsed = pd.to_datetime(df[col], dayfirst=True, errors='coerce')
                 if parsed.notna().sum() >= len(df) * 0.5:  # Ensure at least 50% valid dates
                     df[col] = parsed.dt.strftime(output_format)  # Standardize to ISO format
-                    print(f"📆 Standardized date format in '{col}'")
+                    logger.debug("📆 Standardized date format in '%s'", col)
                 else:
-                    print(f"⚠️ Skipped date standardization for '{col}' due to insufficient valid dates.")
+                    logger.warning("⚠️ Skipped date standardization for '%s' due to insufficient valid dates.", col)
             except Exception as e:
-                print(f"❌ Could not format '{col}': {e}")
+                logger.warning("❌ Could not format '%s': %s", col, e)
         return df
 
+    @profiled
     def standardize_units(self, df: pd.DataFrame):
         """
         Converts different representations of units to a standard unit based on mapping.
         Example: {'kg': ['kilogram', 'kgs', 'kg.', 'kilograms']}
+
+        The whole map is compiled into one alternation applied in a single pass per column,
+        and only string columns whose sampled values contain a unit token are lowercased and
+        rewritten.
         """
-        string_columns = [col for col in df.select_dtypes(include=['object']).columns]
+        pattern, lookup = _compile_unit_map(self.unit_map)
+        string_columns = self._columns('units', lambda: [
+            col for col in df.select_dtypes(include=['object', 'category']).columns
+            if _is_text(df[col])  # e.g. a date column left unformatted
+            and _has_unit_tokens(df[col], pattern)
+        ])
+
+        def to_standard(match):
+            return lookup[match.lastgroup]
+
+        def normalize(values):
+            return values.str.lower().str.replace(pattern, to_standard, regex=True)
 
         for col in string_columns:
-            for standard_unit, variants in self.unit_map.items():
-                df[col] = df[col].str.lower().replace(variants, standard_unit, regex=True)
-        
-        print("⚖️ Standardized unit representations.")
+            if not _is_text(df[col]):
+                continue
+            df[col] = map_categories(df[col], normalize) if is_categorical(df[col]) else normalize(df[col])
+
+        logger.debug("⚖️ Standardized unit representations.")
         return df
 
+    @profiled
     def standardize_boolean_format(self, df: pd.DataFrame):
         """
         Converts yes/no, true/false, y/n, etc., into Python boolean values.
         """
-        boolean_columns = [col for col in df.select_dtypes(include=['bool']).columns]
+        boolean_columns = self._columns('boolean', lambda: [col for col in df.select_dtypes(include=['bool']).columns])
+
+        def to_boolean(values):
+            return values.astype(str).str.lower().str.strip().isin(['true', 'yes', 'y', '1'])
 
         for col in boolean_columns:
-            lowercase_col = df[col].astype(str).str.lower().str.strip()
-            df[col] = lowercase_col.map(lambda x: True if x in ['true', 'yes', 'y', '1'] else False)
-            print(f"✅ Standardized boolean format in '{col}'")
+            df[col] = map_uniques(df[col], to_boolean)  # checked once per distinct value
+            logger.debug("✅ Standardized boolean format in '%s'", col)
         
         return df
 
+    @profiled
     def format_all(self, df: pd.DataFrame):
         df = self.standardize_numerical_format(df)
         df = self.standardize_string_format(df)
@@ -114,15 +175,182 @@ class standardizer:
         df = self.standardize_boolean_format(df)
 
         # Final adjustment: Convert numeric columns to int if all values have .0, otherwise keep as float
-        for col in df.select_dtypes(include=['float']).columns:
+        # Check if all values are integers
+        integer_columns = self._columns('integer', lambda: [
+            col for col in df.select_dtypes(include=['float']).columns if (df[col].dropna() % 1 == 0).all()
+        ])
+        for col in integer_columns:
             try:
-                # Check if all values are integers
-                if (df[col].dropna() % 1 == 0).all():
-                    df[col] = df[col].astype('Int64')  # Convert to integer type
+                df[col] = df[col].astype('Int64')  # Convert to integer type
             except Exception as e:
-                print(f"Error adjusting numeric type for column {col}: {e}")
+                logger.warning("Error adjusting numeric type for column %s: %s", col, e)
 
-        print("Final numeric type adjustments done ✅")
-        print(df.info())
+        logger.info("Final numeric type adjustments done ✅")
+        logger.debug("%s", frame_info(df))
         return df
 
+    def format_all_chunks(self, chunks):
+        """Standardize an iterator of DataFrame chunks, yielding each formatted chunk.
+
+        The columns each step applies to are decided on the first chunk and frozen,
+        so later chunks are formatted identically even when their values alone would
+        lead to different decisions."""
+        self.frozen = False
+        self.column_plan = {}
+        try:
+            for chunk in chunks:
+                chunk = self.format_all(chunk)
+                self.frozen = True
+                yield chunk
+        finally:
+            self.frozen = False
+
+    @profiled
+    def format_all_partitioned(self, df: pd.DataFrame, workers=-1, partitions=None):
+        """Standardize a tall DataFrame split into row partitions on a process pool.
+
+        As in format_all_chunks, the plan is decided on the first partition and frozen,
+        then replayed by the workers on the remaining ones so every partition is formatted
+        the same way; the results are concatenated in row order."""
+        workers = resolve_workers(workers)
+        parts = split_rows(df, partitions or workers)
+        if len(parts) <= 1:
+            return self.format_all(df)
+
+        self.frozen = False
+        self.column_plan = {}
+        try:
+            first = self.format_all(parts[0].copy())
+            self.frozen = True
+            rest = map_partitions(partial(_format_partition, formatter=self), parts[1:], workers)
+        finally:
+            self.frozen = False
+        return pd.concat([first, *rest])
+
+
+def _compile_unit_map(unit_map: dict):
+    """Compile {standard_unit: [variant patterns]} into one pattern with a named group per
+    variant, and the lookup from group name to standard unit."""
+    alternatives, lookup = [], {}
+    for i, (standard_unit, variants) in enumerate(unit_map.items()):
+        for j, variant in enumerate([variants] if isinstance(variants, str) else variants):
+            # The wrapping group closes last, so match.lastgroup names it even when the
+            # variant has groups of its own
+            name = f"unit_{i}_{j}"
+            alternatives.append(f"(?P<{name}>{variant})")
+            lookup[name] = standard_unit
+    return re.compile('|'.join(alternatives) or r'(?!)'), lookup
+
+
+def _is_text(series: pd.Series) -> bool:
+    """Whether a column holds strings, as plain values or as categories."""
+    if is_categorical(series):
+        return pd.api.types.is_string_dtype(series.cat.categories)
+    return pd.api.types.is_string_dtype(series.dtype)
+
+
+def _has_unit_tokens(series: pd.Series, pattern, sample_size: int = UNIT_SAMPLE_SIZE) -> bool:
+    """Whether evenly spaced sampled values of a column (or its categories) contain any unit token."""
+    if is_categorical(series):
+        series = used_categories(series)
+    step = max(len(series) // sample_size, 1)
+    sample = series.iloc[::step].head(sample_size).dropna()
+    return any(pattern.search(value.lower()) for value in sample if isinstance(value, str))
+
+
+def _format_strings(series: pd.Series) -> pd.Series:
+    """Trim, lowercase and collapse inner whitespace of one column. Nulls stay null."""
+    if is_categorical(series):
+        return map_categories(series, _format_strings)
+    return series.astype(str) \
+                 .str.strip() \
+                 .str.lower() \
+                 .str.replace(r'\s+', ' ', regex=True) \
+                 .mask(series.isna())
+
+
+def numeric_pattern(decimal: str = '.', thousands: str = ',') -> str:
+    """Regex for the first number in a string, with named groups `sign` and `number`. The
+    number may use thousands separators (in groups of three), a decimal part and an exponent;
+    currency symbols and spaces may sit between the sign and the digits. A - or + only counts
+    as a sign at the start or after a character other than a letter, digit or dot, so the
+    dash in "ID-123" is not read as a minus."""
+    d = re.escape(decimal)
+    digits = rf'\d+(?:{d}\d+)?|{d}\d+'
+    if thousands:
+        digits = rf'(?:\d{{1,3}}(?:{re.escape(thousands)}\d{{3}})+|\d+)(?:{d}\d+)?|{d}\d+'
+    # (?:^|[^\w.]) stands in for the lookbehind (?<![\w.]), which Arrow's RE2 engine lacks
+    return rf'(?:(?:^|[^\w.])(?P<sign>[-+]))?[\s{re.escape(CURRENCY_SYMBOLS)}]*' \
+           rf'(?P<number>(?:{digits})(?:[eE][-+]?\d+)?)'
+
+
+def parse_numeric_strings(series: pd.Series, decimal: str = '.', thousands: str = ',') -> pd.Series:
+    """Parse the first number in every string of a column in one vectorized pass, e.g.
+    "$ 245 USD" -> 245, "-1,234.5" -> -1234.5, "75000%" -> 75000 (the percent sign is
+    dropped, not applied) and "1.5e3" -> 1500, while "ID-123" -> 123, "SKU-007" -> 7 and
+    "Room-12B" -> 12 stay positive. Values without a number become NaN. Whole
+    numbers come back as int64 when no value is missing, as pd.to_numeric would."""
+    pattern = numeric_pattern(decimal, thousands)
+    if pa is not None:
+        try:
+            values = pa.array(series, from_pandas=True, type=pa.string())
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            values = None  # mixed-type column, handled below
+        if values is not None:
+            parts = pc.extract_regex(values, pattern)
+            number = pc.struct_field(parts, 'number')
+            if thousands:
+                number = pc.replace_substring(number, thousands, '')
+            if decimal != '.':
+                number = pc.replace_substring(number, decimal, '.')
+            number = pc.binary_join_element_wise(pc.struct_field(parts, 'sign'), number, '')
+            parsed = pc.cast(number, pa.float64()).to_numpy(zero_copy_only=False)
+            return _as_numeric(pd.Series(parsed, index=series.index, name=series.name))
+
+    # Mixed-type column or no pyarrow: the same steps with pandas string methods
+    parts = series.astype(str).where(series.notna()).str.extract(pattern)
+    number = parts['number']
+    if thousands:
+        number = number.str.replace(thousands, '', regex=False)
+    if decimal != '.':
+        number = number.str.replace(decimal, '.', regex=False)
+    parsed = pd.to_numeric(parts['sign'].fillna('') + number, errors='coerce').astype('float64')
+    return _as_numeric(pd.Series(parsed.to_numpy(), index=series.index, name=series.name))
+
+
+def _as_numeric(parsed: pd.Series) -> pd.Series:
+    values = parsed.to_numpy()
+    if not np.isnan(values).any() and (values % 1 == 0).all() and (np.abs(values) < 2 ** 63).all():
+        return parsed.astype('int64')
+    return parsed
+
+
+def _extract_numeric_strings(series: pd.Series, decisions: dict, decimal: str = '.', thousands: str = ','):
+    """Parse a string column that holds any digits into numbers, reusing a frozen per-column
+    decision when one is given. Returns (contains_digits, values), with the exception in
+    place of the values when the column cannot be processed."""
+    parse = partial(parse_numeric_strings, decimal=decimal, thousands=thousands)
+    try:
+        contains_digits = decisions.get(series.name)
+        if is_categorical(series):
+            # Checked and parsed once per category, then expanded through the codes
+            if contains_digits is None:
+                contains_digits = bool(used_categories(series).astype(str).str.contains(r'\d', regex=True).any())
+            if contains_digits:
+                return True, map_uniques(series, parse)
+            return False, series
+        if contains_digits is None:
+            contains_digits = bool(series.str.contains(r'\d', regex=True, na=False).any())
+        if contains_digits:
+            return True, parse(series)
+        # Leave the column as string if no numeric values are found; nulls stay null
+        # rather than becoming "nan"
+        return False, series.astype(str).mask(series.isna())
+    except Exception as e:
+        return contains_digits, e
+
+
+def _format_partition(df: pd.DataFrame, formatter: standardizer) -> pd.DataFrame:
+    """Worker side of format_all_partitioned: replay the frozen plan on one partition."""
+    formatter.workers = 1  # already inside a worker process
+    return formatter.format_all(df.copy())
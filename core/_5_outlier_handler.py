@@ -1,63 +1,318 @@
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from utils.parallel import map_columns, resolve_workers
+from utils.sketches import DEFAULT_K, moments, quantile_sketch
+from utils.profiler import profiled
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+BOUND_METHODS = ("zscore", "iqr", "mad")
+MULTIVARIATE_METHODS = ("isolation_forest", "mahalanobis")
+MAD_SCALE = 1.4826         # MAD to standard deviation for normal data, so 'mad' reads as a robust z-score
+MEANAD_SCALE = 1.2533      # mean absolute deviation to standard deviation, used when the MAD is 0
+SAMPLE_SIZE = 10_000       # rows multivariate models are fitted on (MinCovDet takes about 1s on 10k)
+BATCH_SIZE = 1_000_000     # rows scored at a time by multivariate models
+CHI2_QUANTILE = 0.975      # Mahalanobis cut-off (squared distance) when contamination is 'auto'
+FOREST_CONTAMINATION = 0.01  # isolation forest's default share of rows flagged
 
 # 1. Fit bounds using IQR or Z-Score
-def fit_outlier_bounds(df: pd.DataFrame, method: str = "iqr", z_thresh: float = 3.0, iqr_multiplier: float = 1.5) -> dict:
-    bounds = {}
+@profiled
+def fit_outlier_bounds(df: pd.DataFrame, method: str = "iqr", z_thresh: float = 3.0, iqr_multiplier: float = 1.5,
+                       workers: int = None, backend: str = "thread") -> dict:
+    if method not in BOUND_METHODS:
+        raise ValueError(f"Method must be one of {BOUND_METHODS}; use fit_outlier_model for {MULTIVARIATE_METHODS}")
+
     numeric_cols = df.select_dtypes(include=[np.number]).columns
+    column_bounds = partial(_column_bounds, method=method, z_thresh=z_thresh, iqr_multiplier=iqr_multiplier)
+    bounds = map_columns(column_bounds, df, numeric_cols, workers=workers, backend=backend)
 
-    for col in numeric_cols:
-        col_data = df[col].dropna()
+    logger.info("fit_outlier_bounds ✅ Method: %s", method.upper())
+    return bounds
 
-        if method == "zscore":
-            mean = col_data.mean()
-            std = col_data.std()
-            lower = mean - z_thresh * std
-            upper = mean + z_thresh * std
+def _column_bounds(series: pd.Series, method: str, z_thresh: float, iqr_multiplier: float) -> tuple:
+    col_data = series.dropna()
 
-        elif method == "iqr":
-            Q1 = col_data.quantile(0.25)
-            Q3 = col_data.quantile(0.75)
-            IQR = Q3 - Q1
-            lower = Q1 - iqr_multiplier * IQR
-            upper = Q3 + iqr_multiplier * IQR
+    if method == "zscore":
+        mean = col_data.mean()
+        std = col_data.std()
+        lower = mean - z_thresh * std
+        upper = mean + z_thresh * std
+    elif method == "mad":
+        # Robust z-score: distance from the median in scaled median absolute deviations
+        if col_data.nunique() <= 2:
+            # Binary or constant: every value is a level, not an outlier
+            return (col_data.min(), col_data.max())
+        median = col_data.median()
+        deviations = (col_data - median).abs()
+        scale = MAD_SCALE * deviations.median()
+        if scale == 0:
+            # Over half the values sit on the median, so the MAD would collapse the bounds
+            # onto it. The mean absolute deviation is small too when most values are tied,
+            # so in e.g. a mostly-zero column the bounds still flag most nonzero values
+            scale = MEANAD_SCALE * deviations.mean()
+        lower = median - z_thresh * scale
+        upper = median + z_thresh * scale
+    else:
+        Q1 = col_data.quantile(0.25)
+        Q3 = col_data.quantile(0.75)
+        IQR = Q3 - Q1
+        lower = Q1 - iqr_multiplier * IQR
+        upper = Q3 + iqr_multiplier * IQR
 
-        else:
+    return (lower, upper)
+
+class outlier_bounds_estimator:
+    """One-pass, mergeable version of fit_outlier_bounds for data that does not fit in memory.
+
+    `update` folds in a chunk: every numeric column feeds a moments accumulator (zscore)
+    or a KLL quantile_sketch (iqr), so memory stays constant whatever the row count.
+    Estimators fed different chunks or partitions, e.g. in separate processes, combine
+    with `merge`. zscore bounds match fit_outlier_bounds up to rounding. iqr bounds are
+    exact until a column has more than k values. Past that, Q1 and Q3 are the values at
+    ranks within `rank_error()` of 25% and 75% (about 1.3% at k=200, 99% confidence)."""
+
+    def __init__(self, method: str = "iqr", z_thresh: float = 3.0, iqr_multiplier: float = 1.5, k: int = DEFAULT_K):
+        if method not in ("zscore", "iqr"):
             raise ValueError("Method must be 'zscore' or 'iqr'")
+        self.method = method
+        self.z_thresh = z_thresh
+        self.iqr_multiplier = iqr_multiplier
+        self.k = k
+        self.columns = {}  # column -> its moments or quantile_sketch, in first-seen order
 
-        bounds[col] = (lower, upper)
+    def _new_summary(self):
+        return moments() if self.method == "zscore" else quantile_sketch(self.k)
+
+    def update(self, df: pd.DataFrame):
+        for col in df.select_dtypes(include=[np.number]).columns:
+            if col not in self.columns:
+                self.columns[col] = self._new_summary()
+            self.columns[col].update(df[col].to_numpy(dtype=np.float64, na_value=np.nan))
+        return self
+
+    def merge(self, other: 'outlier_bounds_estimator'):
+        if (other.method, other.k) != (self.method, self.k):
+            raise ValueError("Only estimators with the same method and k can be merged")
+        for col, summary in other.columns.items():
+            if col not in self.columns:
+                self.columns[col] = self._new_summary()
+            self.columns[col].merge(summary)
+        return self
+
+    def rank_error(self) -> float:
+        """Worst rank error of the iqr quartiles over all columns (0 when exact or zscore)."""
+        if self.method == "zscore":
+            return 0.0
+        return max((summary.rank_error() for summary in self.columns.values()), default=0.0)
+
+    def bounds(self) -> dict:
+        bounds = {}
+        for col, summary in self.columns.items():
+            if self.method == "zscore":
+                mean, std = (summary.mean, summary.std()) if summary.count else (np.nan, np.nan)
+                bounds[col] = (mean - self.z_thresh * std, mean + self.z_thresh * std)
+            else:
+                Q1, Q3 = summary.quantiles([0.25, 0.75])
+                IQR = Q3 - Q1
+                bounds[col] = (Q1 - self.iqr_multiplier * IQR, Q3 + self.iqr_multiplier * IQR)
+        return bounds
 
-    print(f"fit_outlier_bounds ✅ Method: {method.upper()}")
-    return bounds
+
+@profiled
+def fit_outlier_bounds_chunks(chunks, method: str = "iqr", z_thresh: float = 3.0, iqr_multiplier: float = 1.5,
+                              k: int = DEFAULT_K) -> dict:
+    """fit_outlier_bounds over an iterator of chunks (e.g. from iter_file) in one pass and
+    constant memory, through outlier_bounds_estimator."""
+    estimator = outlier_bounds_estimator(method, z_thresh, iqr_multiplier, k)
+    for chunk in chunks:
+        estimator.update(chunk)
+    logger.info("fit_outlier_bounds_chunks ✅ Method: %s, rank error ≤ %.2f%%", method.upper(),
+                100 * estimator.rank_error())
+    return estimator.bounds()
+
+class outlier_model:
+    """A multivariate outlier detector fitted by fit_outlier_model, applied with
+    remove_outliers like a bounds dict. Rows are scored in batches of `batch_size`, so
+    memory stays bounded on frames of any length, on `workers` threads (scikit-learn
+    releases the GIL while scoring). A missing value is scored as the column's median
+    in the fitting sample."""
+
+    def __init__(self, method: str, columns: list, fill_values: np.ndarray, estimator, threshold: float,
+                 batch_size: int = BATCH_SIZE, workers: int = None):
+        self.method = method
+        self.columns = columns
+        self.fill_values = fill_values
+        self.estimator = estimator
+        self.threshold = threshold
+        self.batch_size = batch_size
+        self.workers = workers
+
+    def _values(self, df: pd.DataFrame) -> np.ndarray:
+        values = df.reindex(columns=self.columns).to_numpy(dtype=np.float64, na_value=np.nan)
+        missing = np.isnan(values)
+        if missing.any():
+            values[missing] = np.broadcast_to(self.fill_values, values.shape)[missing]
+        return values
+
+    def scores(self, df: pd.DataFrame) -> np.ndarray:
+        """Outlyingness of every row, higher is more outlying: the squared Mahalanobis
+        distance, or the negated isolation forest score."""
+        scores = np.empty(len(df))
+
+        def score_batch(start):
+            values = self._values(df.iloc[start:start + self.batch_size])
+            if self.method == "mahalanobis":
+                scores[start:start + len(values)] = self.estimator.mahalanobis(values)
+            else:
+                scores[start:start + len(values)] = -self.estimator.score_samples(values)
+
+        starts = range(0, len(df), self.batch_size)
+        workers = min(resolve_workers(self.workers), len(starts))
+        if workers <= 1:
+            for start in starts:
+                score_batch(start)
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                list(pool.map(score_batch, starts))
+        return scores
+
+    def outlier_mask(self, df: pd.DataFrame) -> np.ndarray:
+        return self.scores(df) > self.threshold
+
+
+@profiled
+def fit_outlier_model(df: pd.DataFrame, method: str = "mahalanobis", contamination=None,
+                      sample_size: int = SAMPLE_SIZE, batch_size: int = BATCH_SIZE, workers: int = None,
+                      random_state: int = 0) -> outlier_model:
+    """Fit a multivariate outlier detector on a random sample of `sample_size` rows of the
+    numeric columns, so fitting time does not grow with the frame.
+
+    - isolation_forest: scikit-learn's IsolationForest (100 trees of 256 rows each)
+    - mahalanobis: squared Mahalanobis distance from a Minimum Covariance Determinant
+      fit (MinCovDet), robust to the outliers it is looking for
+
+    contamination 'auto' cuts Mahalanobis distances at the CHI2_QUANTILE quantile of the
+    chi-square distribution, and isolation forest scores at the original paper's 0.5,
+    which flags far more rows on smooth data (18% of a Gaussian sample). A share, e.g.
+    0.01, instead flags that share of the sample. None is 'auto' for mahalanobis and
+    FOREST_CONTAMINATION for isolation_forest. Columns that are constant or empty in the
+    sample are left out."""
+    if method not in MULTIVARIATE_METHODS:
+        raise ValueError(f"Method must be one of {MULTIVARIATE_METHODS}")
+    if contamination is None:
+        contamination = FOREST_CONTAMINATION if method == "isolation_forest" else "auto"
+
+    numeric = df.select_dtypes(include=[np.number])
+    sample = numeric.sample(sample_size, random_state=random_state) if len(numeric) > sample_size else numeric
+    sample = sample.to_numpy(dtype=np.float64, na_value=np.nan)
+    with np.errstate(all='ignore'):
+        usable = np.nanstd(sample, axis=0) > 0
+    columns = list(numeric.columns[usable])
+    if not columns:
+        raise ValueError("No numeric column varies in the sample")
+    sample = sample[:, usable]
+    fill_values = np.nanmedian(sample, axis=0)
+    sample = np.where(np.isnan(sample), fill_values, sample)
+
+    if method == "isolation_forest":
+        from sklearn.ensemble import IsolationForest
+        estimator = IsolationForest(contamination=contamination, random_state=random_state).fit(sample)
+        threshold = -estimator.offset_
+    else:
+        from sklearn.covariance import MinCovDet
+        estimator = MinCovDet(random_state=random_state).fit(sample)
+        if contamination == "auto":
+            from scipy.stats import chi2
+            threshold = chi2.ppf(CHI2_QUANTILE, df=len(columns))
+        else:
+            threshold = np.quantile(estimator.mahalanobis(sample), 1 - contamination)
+
+    logger.info("fit_outlier_model ✅ Method: %s on %s rows x %s columns", method.upper(), len(sample), len(columns))
+    return outlier_model(method, columns, fill_values, estimator, float(threshold), batch_size, workers)
 
 # 2. Remove outliers based on bounds
-def remove_outliers(df: pd.DataFrame, bounds: dict) -> pd.DataFrame:
-    df_cleaned = df.copy()
-    for col, (lower, upper) in bounds.items():
-        before_count = df_cleaned.shape[0]
-        df_cleaned = df_cleaned[(df_cleaned[col] >= lower) & (df_cleaned[col] <= upper)]
-        after_count = df_cleaned.shape[0]
-        print(f"remove_outliers ✅ {col}: Removed {before_count - after_count} rows")
+def _bounded_block(df: pd.DataFrame, bounds: dict):
+    """The bounded columns as one column-major float block (missing values as NaN), so each
+    column is a contiguous slice, with their lower and upper bounds as arrays that
+    broadcast over its rows."""
+    cols = list(bounds)
+    values = np.empty((len(df), len(cols)), dtype=np.float64, order='F')
+    for i, col in enumerate(cols):
+        values[:, i] = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+    lower = np.array([bounds[col][0] for col in cols], dtype=np.float64)
+    upper = np.array([bounds[col][1] for col in cols], dtype=np.float64)
+    return cols, values, lower, upper
+
+def outlier_mask(df: pd.DataFrame, bounds):
+    """Which rows hold an outlier in any bounded column, and how many per column, from one
+    comparison over the bounded columns as a single block. Missing values and NaN bounds
+    never count as outliers. For an outlier_model the count is keyed by its method."""
+    if isinstance(bounds, outlier_model):
+        outliers = bounds.outlier_mask(df)
+        return outliers, pd.Series({bounds.method: int(outliers.sum())}, dtype='int64')
+    cols, values, lower, upper = _bounded_block(df, bounds)
+    outside = (values < lower) | (values > upper)
+    return outside.any(axis=1), pd.Series(outside.sum(axis=0), index=cols, dtype='int64')
+
+@profiled
+def remove_outliers(df: pd.DataFrame, bounds) -> pd.DataFrame:
+    outliers, counts = outlier_mask(df, bounds)
+    for col, count in counts.items():
+        logger.debug("remove_outliers ✅ %s: %s outliers", col, count)
+    df_cleaned = df[~outliers]
+    logger.info("remove_outliers ✅ Removed %s rows", int(outliers.sum()))
     return df_cleaned
 
 # 3. Cap outliers instead of removing
+@profiled
 def cap_outliers(df: pd.DataFrame, bounds: dict) -> pd.DataFrame:
-    df_capped = df.copy()
-    for col, (lower, upper) in bounds.items():
-        df_capped[col] = df_capped[col].clip(lower, upper)
-        print(f"cap_outliers ✅ {col}: Values capped to range ({lower}, {upper})")
+    if isinstance(bounds, outlier_model):
+        raise ValueError(f"'{bounds.method}' flags whole rows, which cannot be capped; use remove_outliers")
+    cols, values, lower, upper = _bounded_block(df, bounds)
+    counts = np.count_nonzero(values < lower, axis=0) + np.count_nonzero(values > upper, axis=0)
+    # A NaN bound leaves that side unbounded; NaN values stay NaN
+    capped = np.clip(values, np.nan_to_num(lower, nan=-np.inf), np.nan_to_num(upper, nan=np.inf), out=values)
+
+    # Only columns with a capped value are replaced; the others are shared with the input
+    df_capped = df.copy(deep=False)
+    for i, col in enumerate(cols):
+        if counts[i]:
+            df_capped[col] = _capped_column(df[col], capped[:, i])
+        logger.debug("cap_outliers ✅ %s: %s values capped to range (%s, %s)", col, counts[i], lower[i], upper[i])
     return df_capped
 
+def _capped_column(series: pd.Series, values: np.ndarray) -> pd.Series:
+    """Capped float values in the column's own float dtype, or the float counterpart of an
+    integer one (bounds are rarely whole numbers): Float64 for nullable columns."""
+    if series.dtype.kind == 'f':
+        dtype = series.dtype
+    elif isinstance(series.dtype, pd.api.extensions.ExtensionDtype):
+        dtype = 'Float64'
+    else:
+        dtype = np.float64
+    return pd.Series(values, index=series.index, name=series.name).astype(dtype, copy=False)
+
 # 4. Dynamic decision logic: auto-cap or auto-remove
-def adaptive_outlier_handling(df: pd.DataFrame, method: str = "iqr", strategy: str = "auto") -> pd.DataFrame:
-    bounds = fit_outlier_bounds(df, method=method)
+@profiled
+def adaptive_outlier_handling(df: pd.DataFrame, method: str = "iqr", strategy: str = "auto", contamination=None,
+                              sample_size: int = SAMPLE_SIZE, workers: int = None) -> pd.DataFrame:
+    """Fit `method` on df and cap or remove its outliers. contamination and sample_size
+    are passed to fit_outlier_model for the multivariate methods, workers to either fit."""
+    multivariate = method in MULTIVARIATE_METHODS
+    if multivariate:
+        bounds = fit_outlier_model(df, method=method, contamination=contamination, sample_size=sample_size,
+                                   workers=workers)
+    else:
+        bounds = fit_outlier_bounds(df, method=method, workers=workers)
     row_count = df.shape[0]
 
     if strategy == "auto":
-        strategy = "cap" if row_count <= 1000 else "remove"
-        print(f"adaptive_outlier_handling 🚦 Auto-selected strategy: {strategy.upper()}")
+        # Multivariate methods flag whole rows, which can only be removed
+        strategy = "cap" if row_count <= 1000 and not multivariate else "remove"
+        logger.info("adaptive_outlier_handling 🚦 Auto-selected strategy: %s", strategy.upper())
 
     if strategy == "cap":
         return cap_outliers(df, bounds)
@@ -68,12 +323,15 @@ def adaptive_outlier_handling(df: pd.DataFrame, method: str = "iqr", strategy: s
 
 # 5. Optional visualization for debugging
 def visualize_outliers(df: pd.DataFrame, method: str = "iqr", columns: list = None, z_thresh: float = 3.0, iqr_multiplier: float = 1.5):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
     numeric_cols = df.select_dtypes(include=["number"]).columns
     columns = columns or numeric_cols
 
     for col in columns:
         if col not in df.columns:
-            print(f"⚠️ Column '{col}' not in DataFrame.")
+            logger.warning("⚠️ Column '%s' not in DataFrame.", col)
             continue
 
         col_data = df[col].dropna()
@@ -1,68 +1,117 @@
 # >--missing_value_handling--<
 
-from sklearn.impute import KNNImputer, SimpleImputer
-from sklearn.linear_model import LinearRegression, LogisticRegression
-from sklearn.pipeline import make_pipeline
-from sklearn.preprocessing import StandardScaler
 import numpy as np
 import pandas as pd
 import warnings
-
-def _regression_impute(df: pd.DataFrame, target_col: str, model, categorical=False):
+from functools import partial
+from utils.parallel import map_columns
+from utils.profiler import profiled
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+def _predictors(df: pd.DataFrame, numeric_cols) -> np.ndarray:
+    """The complete, non-constant numeric columns as one standardized float block, built
+    once and shared by every target's model (columns with gaps are the targets)."""
+    cols = [col for col in numeric_cols if df[col].notna().all()]
+    predictors = np.empty((len(df), len(cols)), dtype=np.float64, order='F')
+    for i, col in enumerate(cols):
+        predictors[:, i] = df[col].to_numpy(dtype=np.float64)
+    std = predictors.std(axis=0)
+    varying = std > 0
+    return (predictors[:, varying] - predictors[:, varying].mean(axis=0)) / std[varying]
+
+def _predict_missing(series: pd.Series, predictors: np.ndarray, categorical: bool = False):
     """
-    Uses regression model to impute missing values for target_col.
-    Supports both linear and logistic (categorical=True).
+    Fits a model for one target column on its complete rows and predicts its missing
+    ones: linear regression (on log1p of the target when every value is above -1) or,
+    with categorical=True, logistic regression over its labels.
+    Returns (missing row mask, predictions, error); the frame itself is not touched.
     """
-    df = df.copy()
-    cols = [c for c in df.columns if c != target_col and df[c].notna().all()]
-    if not cols:
-        raise ValueError(f"No complete columns available to use as predictors for '{target_col}'.")
-
-    complete_rows = df[df[target_col].notna()]
-    missing_rows = df[df[target_col].isna()]
-
-    X_train = complete_rows[cols]
-    y_train = complete_rows[target_col]
-    X_test = missing_rows[cols]
-
-    if categorical:
-        # Convert categorical target to numeric
-        mapping = {k: i for i, k in enumerate(y_train.dropna().unique())}
-        y_train = y_train.map(mapping)
-        model = make_pipeline(StandardScaler(), model)
-        model.fit(X_train, y_train)
-        pred = model.predict(X_test)
-        inv_map = {v: k for k, v in mapping.items()}
-        df.loc[df[target_col].isna(), target_col] = [inv_map.get(int(round(x)), np.nan) for x in pred]
+    from sklearn.linear_model import LinearRegression, LogisticRegression
+
+    missing = series.isna().to_numpy()
+    try:
+        if predictors.shape[1] == 0:
+            raise ValueError(f"No complete columns available to use as predictors for '{series.name}'.")
+        X_train, X_test = predictors[~missing], predictors[missing]
+
+        if categorical:
+            codes, labels = pd.factorize(series[~missing])
+            if len(labels) == 1:
+                return missing, np.repeat(labels.to_numpy(), missing.sum()), None
+            model = LogisticRegression().fit(X_train, codes)
+            return missing, labels.take(model.predict(X_test)).to_numpy(), None
+
+        y_train = series[~missing].to_numpy(dtype=np.float64)
+        if (y_train > -1).all():
+            pred = np.expm1(LinearRegression().fit(X_train, np.log1p(y_train)).predict(X_test))
+        else:
+            pred = LinearRegression().fit(X_train, y_train).predict(X_test)
+        return missing, pred, None
+    except Exception as e:
+        return missing, None, e
+
+def _write_missing(df: pd.DataFrame, col: str, missing: np.ndarray, values: np.ndarray):
+    """Writes imputed values into the missing rows of one column of `df`. Numeric columns
+    become their float counterpart, since predictions are rarely whole numbers."""
+    series = df[col]
+    if not pd.api.types.is_numeric_dtype(series.dtype):
+        filled = series.copy()
+        filled[missing] = values
+        df[col] = filled
+        return
+    if series.dtype.kind == 'f':
+        dtype = series.dtype
+    elif isinstance(series.dtype, pd.api.extensions.ExtensionDtype):
+        dtype = 'Float64'
     else:
-        model = make_pipeline(StandardScaler(), model)
-        try:
-            model.fit(X_train, np.log1p(y_train))
-            pred = np.expm1(model.predict(X_test))
-        except:
-            model.fit(X_train, y_train)
-            pred = model.predict(X_test)
-        df.loc[df[target_col].isna(), target_col] = pred
-
-    return df
+        dtype = np.float64
+    filled = series.to_numpy(dtype=np.float64, na_value=np.nan, copy=True)
+    filled[missing] = values
+    df[col] = pd.Series(filled, index=series.index, name=col).astype(dtype, copy=False)
 
-
-def impute_missing_values(self, df: pd.DataFrame, strategy: str = 'mean', n_neighbors: int = 3):
+def _regression_impute(df: pd.DataFrame, targets, predictors: np.ndarray, categorical: bool = False,
+                       workers: int = None) -> dict:
+    """
+    Imputes every target column from the shared predictor block, one model per target
+    fitted in parallel threads when workers is set, writing the predictions into `df`
+    in place. Returns {column: error} for the targets whose model could not be fitted.
+    """
+    predict = partial(_predict_missing, predictors=predictors, categorical=categorical)
+    failed = {}
+    for col, (missing, values, error) in map_columns(predict, df, targets, workers=workers).items():
+        if error is not None:
+            failed[col] = error
+        else:
+            _write_missing(df, col, missing, values)
+    return failed
+
+
+@profiled
+def impute_missing_values(self, df: pd.DataFrame, strategy: str = 'mean', n_neighbors: int = 3, workers: int = None):
     """
     Fills missing values using various strategies:
     'mean', 'median', 'mode', 'knn', 'linreg', 'logreg', 'auto'
 
     Auto Strategy:
     - numeric → linreg → knn
-    - categorical → logreg → knn
+    - categorical → logreg
+
+    The regression strategies predict every target column from the same predictors,
+    the complete numeric columns, standardized once; the per-target models are fitted
+    in parallel and their predictions written into the missing rows.
 
     Args:
         df: pandas DataFrame
         strategy: imputation method
         n_neighbors: used for knn strategy
+        workers: threads fitting the regression models (see utils/parallel.py)
     Returns:
         df: DataFrame with imputed values
     """
+    from sklearn.impute import KNNImputer
+
     df = df.copy()
     numeric_cols = df.select_dtypes(include=['number']).columns
     categorical_cols = df.select_dtypes(exclude=['number']).columns
@@ -80,48 +129,46 @@ def impute_missing_values(self, df: pd.DataFrame, strategy: str = 'mean', n_neig
                 else:
                     value = df[col].mode()[0]
                 df[col] = df[col].fillna(value)
-        print(f"impute_missing_values ({strategy}) ✅")
+        logger.info("impute_missing_values (%s) ✅", strategy)
 
     elif strategy == 'knn':
         imputer = KNNImputer(n_neighbors=n_neighbors)
         df[numeric_cols] = imputer.fit_transform(df[numeric_cols])
-        print("impute_missing_values (knn) ✅")
-
-    elif strategy == 'linreg':
-        for col in numeric_cols:
-            if df[col].isna().sum() > 0:
-                df = _regression_impute(df, col, model=LinearRegression())
-        print("impute_missing_values (linreg) ✅")
-
-    elif strategy == 'logreg':
-        for col in categorical_cols:
-            if df[col].isna().sum() > 0:
-                df = _regression_impute(df, col, model=LogisticRegression(), categorical=True)
-        print("impute_missing_values (logreg) ✅")
-
-    elif strategy == 'auto':
-        # numeric
-        for col in numeric_cols:
-            if df[col].isna().sum() > 0:
-                try:
-                    df = _regression_impute(df, col, model=LinearRegression())
-                except:
-                    try:
-                        imputer = KNNImputer(n_neighbors=n_neighbors)
-                        df[numeric_cols] = imputer.fit_transform(df[numeric_cols])
-                        print(f"Auto fallback to KNN for {col}")
-                    except:
-                        warnings.warn(f"Auto strategy failed for numeric col: {col}")
-
-        # categorical
-        for col in categorical_cols:
-            if df[col].isna().sum() > 0:
-                try:
-                    df = _regression_impute(df, col, model=LogisticRegression(), categorical=True)
-                except:
-                    warnings.warn(f"Auto strategy failed for categorical col: {col}")
-
-        print("impute_missing_values (auto) ✅")
+        logger.info("impute_missing_values (knn) ✅")
+
+    elif strategy in ['linreg', 'logreg', 'auto']:
+        predictors = _predictors(df, numeric_cols)
+        failed = {}
+        if strategy in ['linreg', 'auto']:
+            targets = [col for col in numeric_cols if df[col].isna().any()]
+            failed.update(_regression_impute(df, targets, predictors, workers=workers))
+        if strategy in ['logreg', 'auto']:
+            targets = [col for col in categorical_cols if df[col].isna().any()]
+            failed.update(_regression_impute(df, targets, predictors, categorical=True, workers=workers))
+
+        if strategy != 'auto' and failed:
+            raise next(iter(failed.values()))
+
+        # Numeric targets without a model share one KNN fit over the numeric columns
+        knn_targets = [col for col in failed if col in numeric_cols]
+        if knn_targets:
+            knn_cols = [col for col in numeric_cols if df[col].notna().any()]
+            try:
+                imputer = KNNImputer(n_neighbors=n_neighbors)
+                filled = pd.DataFrame(imputer.fit_transform(df[knn_cols]), columns=knn_cols, index=df.index)
+                for col in knn_targets:
+                    if col in knn_cols:
+                        missing = df[col].isna().to_numpy()
+                        _write_missing(df, col, missing, filled[col].to_numpy()[missing])
+                        del failed[col]
+                logger.debug("Auto fallback to KNN for %s", knn_targets)
+            except Exception:
+                pass
+        for col in failed:
+            kind = 'numeric' if col in numeric_cols else 'categorical'
+            warnings.warn(f"Auto strategy failed for {kind} col: {col}")
+
+        logger.info("impute_missing_values (%s) ✅", strategy)
 
     else:
         raise ValueError("Invalid strategy. Choose from 'mean', 'median', 'mode', 'knn', 'linreg', 'logreg', 'auto'.")
@@ -129,6 +176,51 @@ def impute_missing_values(self, df: pd.DataFrame, strategy: str = 'mean', n_neig
     return df
 
 
+@profiled
+def fit_fill_values(df: pd.DataFrame, strategy: str = 'mean') -> dict:
+    """
+    Learns one fill value per column with the 'mean', 'median' or 'mode' strategy
+    (non-numeric columns always use the mode), so new batches can be filled with
+    transform_fill_values without looking at their own statistics.
+    """
+    if strategy not in ['mean', 'median', 'mode']:
+        raise ValueError("Invalid strategy. Choose from 'mean', 'median', 'mode'.")
+
+    numeric_cols = df.select_dtypes(include=['number']).columns
+    fill_values = {}
+    for col in df.columns:
+        if df[col].notna().sum() == 0:
+            continue
+        if col in numeric_cols and strategy == 'mean':
+            fill_values[col] = df[col].mean()
+        elif col in numeric_cols and strategy == 'median':
+            fill_values[col] = df[col].median()
+        else:
+            fill_values[col] = df[col].mode()[0]
+    logger.info("fit_fill_values (%s) ✅", strategy)
+    return fill_values
+
+
+@profiled
+def transform_fill_values(df: pd.DataFrame, fill_values: dict) -> pd.DataFrame:
+    """Fills missing values with the per-column values learned by fit_fill_values."""
+    fill_values = {col: value for col, value in fill_values.items() if col in df.columns}
+    for col, value in fill_values.items():
+        if not df[col].isna().any():
+            continue
+        # A categorical batch may not hold the learned value among its categories
+        if isinstance(df[col].dtype, pd.CategoricalDtype) and value not in df[col].cat.categories:
+            df[col] = df[col].cat.add_categories([value])
+        # A nullable integer column cannot hold a fractional mean or median
+        elif pd.api.types.is_integer_dtype(df[col].dtype) and isinstance(value, (float, np.floating)) \
+                and not float(value).is_integer():
+            df[col] = df[col].astype('Float64' if isinstance(df[col].dtype, pd.api.extensions.ExtensionDtype)
+                                     else np.float64)
+    df = df.fillna(value=fill_values)
+    logger.info("transform_fill_values ✅")
+    return df
+
+
 # ---------------------------------------------------------
 #################### Date Extraction ######################
 # ---------------------------------------------------------
@@ -153,7 +245,7 @@ def extract_dates(self, dataframe: pd.DataFrame, date_format: str = None):
                 dataframe[f"{column}_year"] = parsed_dates.dt.year
 
         except Exception as e:
-            print(f"Error processing column {column}: {e}")
+            logger.warning("Error processing column %s: %s", column, e)
 
     return dataframe
 
@@ -1,5 +1,22 @@
 # Datatype_correction.py
 
+import numpy as np
+import pandas as pd
+from core._2_detector import datadetector
+from utils.categories import CATEGORY_RATIO, is_low_cardinality, to_category
+from utils.logger import get_logger
+
+try:
+    import pyarrow  # noqa: F401
+    STRING_DTYPE = 'string[pyarrow]'
+except ImportError:  # optional; without it text columns that are not categorical stay object
+    STRING_DTYPE = None
+
+logger = get_logger(__name__)
+
+INTEGER_WIDTHS = [np.int8, np.int16, np.int32, np.int64]
+UNSIGNED_WIDTHS = [np.uint8, np.uint16, np.uint32, np.uint64]
+
 def enforce_column_types(df: pd.DataFrame, type_map: dict):
     """
     Force column types based on a given type mapping dictionary.
@@ -7,14 +24,14 @@ def enforce_column_types(df: pd.DataFrame, type_map: dict):
     """
     for col, expected_type in type_map.items():
         if col not in df.columns:
-            print(f"⚠️ Column '{col}' not found. Skipping.")
+            logger.warning("⚠️ Column '%s' not found. Skipping.", col)
             continue
 
         try:
             df[col] = df[col].astype(expected_type)
-            print(f"✅ '{col}' converted to {expected_type}")
+            logger.debug("✅ '%s' converted to %s", col, expected_type)
         except Exception as e:
-            print(f"❌ Could not convert '{col}' to {expected_type}: {e}")
+            logger.warning("❌ Could not convert '%s' to %s: %s", col, expected_type, e)
 
     return df
 
@@ -29,7 +46,7 @@ def convert_types_as_needed(df: pd.DataFrame):
                 converted = pd.to_numeric(df[col], errors='coerce')
                 if converted.notna().sum() >= len(df) * 0.8:
                     df[col] = converted
-                    print(f"🔢 Converted '{col}' to numeric")
+                    logger.debug("🔢 Converted '%s' to numeric", col)
                     continue
             except:
                 pass
@@ -39,7 +56,7 @@ def convert_types_as_needed(df: pd.DataFrame):
                 converted = pd.to_datetime(df[col], errors='coerce')
                 if converted.notna().sum() >= len(df) * 0.8:
                     df[col] = converted
-                    print(f"🗓️ Converted '{col}' to datetime")
+                    logger.debug("🗓️ Converted '%s' to datetime", col)
                     continue
             except:
                 pass
@@ -47,67 +64,91 @@ def convert_types_as_needed(df: pd.DataFrame):
             # Try boolean conversion
             if df[col].dropna().str.lower().isin(['true', 'false', 'yes', 'no']).all():
                 df[col] = df[col].str.lower().map({'true': True, 'false': False, 'yes': True, 'no': False})
-                print(f"✅ Converted '{col}' to boolean")
+                logger.debug("✅ Converted '%s' to boolean", col)
     
     return df
 
-from dateutil.parser import parse
-import re
-
-def detect_types_proactively(df: pd.DataFrame, sample_size: int = 10):
+def detect_types_proactively(df: pd.DataFrame, sample_size: int = 1000, confidence_threshold: float = 0.95):
     """
-    Predict column types from a few top rows. Returns a dict: {column: predicted_type}
+    Predict column types from a stratified sample (first, last and random rows) without
+    converting anything. Returns a dict: {column: (predicted_type, confidence)}
+    Columns whose sample is ambiguous (confidence below the threshold) are fully scanned.
     Useful for early validation or logging before final cleanup.
     """
-    predicted_types = {}
-    time_pattern = re.compile(r"^\d{2}:\d{2}:\d{2}$")
+    detector = datadetector(sample_size=sample_size, confidence_threshold=confidence_threshold)
+    return detector.infer_column_types(df)
 
-    for col in df.columns:
-        sample = df[col].dropna().astype(str).head(sample_size).str.strip()
 
-        # Boolean check
-        if sample.str.lower().isin(['true', 'false', 'yes', 'no']).all():
-            predicted_types[col] = 'bool'
-            continue
-
-        # Time check
-        if sample.str.match(time_pattern).all():
-            predicted_types[col] = 'time'
-            continue
-
-        # Date check
-        date_count = 0
-        for val in sample:
-            try:
-                parse(val, fuzzy=False, dayfirst=True)
-                date_count += 1
-            except:
-                pass
-        if date_count >= len(sample) * 0.8:
-            predicted_types[col] = 'date'
-            continue
-
-        # Numeric check
-        numeric_sample = pd.to_numeric(sample, errors='coerce')
-        if numeric_sample.notna().all():
-            if all(float(x).is_integer() for x in numeric_sample):
-                predicted_types[col] = 'int'
-            else:
-                predicted_types[col] = 'float'
-            continue
-
-        predicted_types[col] = 'str'
-
-    return predicted_types
-
-
-# Predict types before applying conversions
-predicted = detect_types_proactively(df)
-print(predicted)
-
-# Force specific column types (from config or manual mapping)
-type_map = {"age": int, "salary": float, "joined": "datetime64[ns]"}
-df = enforce_column_types(df, type_map)
-
-# Optional: auto-convert wherever needed
-df = convert_types_as_needed(df)
+def optimize_memory(df: pd.DataFrame, category_ratio: float = CATEGORY_RATIO, string_dtype: str = STRING_DTYPE):
+    """
+    Shrinks every column to the smallest dtype that holds its values exactly:
+    - integers (numpy or nullable) to the narrowest width of the same signedness
+    - floats to float32 when every value survives the round trip
+    - text to category when it has at most category_ratio distinct values per row,
+      otherwise to string_dtype (pyarrow-backed strings when available)
+    A column is only replaced when that makes it smaller. Widths are decided from the
+    values at hand, so batches of one stream can come out with different dtypes.
+    Returns the frame and a per-column report of dtypes and bytes before and after.
+    """
+    report = []
+    for col in df.columns:
+        series = df[col]
+        before = int(series.memory_usage(index=False, deep=True))
+        optimized = _optimized_column(series, category_ratio, string_dtype)
+        after = int(optimized.memory_usage(index=False, deep=True)) if optimized is not None else before
+        if after < before:
+            df[col] = optimized
+        else:
+            after = before
+        report.append({'column': col, 'dtype_before': str(series.dtype), 'dtype_after': str(df[col].dtype),
+                       'bytes_before': before, 'bytes_after': after})
+        if after < before:
+            logger.debug("🗜️ '%s': %s → %s, %d → %d bytes", col, series.dtype, df[col].dtype, before, after)
+
+    report = pd.DataFrame(report, columns=['column', 'dtype_before', 'dtype_after', 'bytes_before', 'bytes_after'])
+    report = report.set_index('column')
+    total_before, total_after = report['bytes_before'].sum(), report['bytes_after'].sum()
+    logger.info("optimize_memory ✅ %d → %d bytes", total_before, total_after)
+    return df, report
+
+
+def _nullable_name(width) -> str:
+    """Name of the nullable pandas dtype for a numpy integer type, e.g. uint8 -> UInt8."""
+    name = np.dtype(width).name
+    return 'UInt' + name[4:] if name.startswith('uint') else 'Int' + name[3:]
+
+
+def _optimized_column(series: pd.Series, category_ratio: float, string_dtype: str):
+    """The column in its smallest exact dtype, or None when there is nothing to try."""
+    dtype = series.dtype
+    if pd.api.types.is_bool_dtype(dtype) or isinstance(dtype, pd.CategoricalDtype):
+        return None
+    nullable = isinstance(dtype, pd.api.extensions.ExtensionDtype)
+
+    if pd.api.types.is_integer_dtype(dtype):
+        values = series.dropna()
+        if values.empty:
+            return None
+        low, high = values.min(), values.max()
+        widths = UNSIGNED_WIDTHS if pd.api.types.is_unsigned_integer_dtype(dtype) else INTEGER_WIDTHS
+        for width in widths:
+            if np.iinfo(width).min <= low and high <= np.iinfo(width).max:
+                target = pd.api.types.pandas_dtype(_nullable_name(width) if nullable else width)
+                return series if target == dtype else series.astype(target)
+        return None
+
+    if pd.api.types.is_float_dtype(dtype):
+        values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+        with np.errstate(over='ignore'):
+            narrowed = values.astype(np.float32)
+        if not np.array_equal(narrowed.astype(np.float64), values, equal_nan=True):
+            return None
+        return series.astype('Float32' if nullable else np.float32)
+
+    if dtype == object and pd.api.types.infer_dtype(series, skipna=True) == 'string':
+        unique_count = series.nunique(dropna=True)
+        if is_low_cardinality(unique_count, len(series), category_ratio):
+            return to_category(series)
+        if string_dtype is not None:
+            return series.astype(string_dtype)
+    return None
@@ -1,7 +1,9 @@
 # >--feature_selector.py--<
 
-from sklearn.feature_selection import RFE, SelectKBest, f_classif
-from sklearn.linear_model import LogisticRegression
+import pandas as pd
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 def fit_feature_selector(X, y, method="rfe", estimator=None, k="all"):
     """
@@ -20,6 +22,9 @@ def fit_feature_selector(X, y, method="rfe", estimator=None, k="all"):
     Returns:
     - selected_features (list): List of selected feature names
     """
+    from sklearn.feature_selection import RFE, SelectKBest, f_classif
+    from sklearn.linear_model import LogisticRegression
+
     if estimator is None:
         estimator = LogisticRegression()  # Default estimator if none is provided
     
@@ -33,7 +38,7 @@ def fit_feature_selector(X, y, method="rfe", estimator=None, k="all"):
         raise ValueError(f"Unknown method: {method}")
 
     selected_features = X.columns[selector.support_].tolist()
-    print(f"✅ Selected Features: {selected_features}")
+    logger.info("✅ Selected Features: %s", selected_features)
     return selected_features
 
 def drop_selected_features(X, selected_features):
@@ -48,14 +53,9 @@ def drop_selected_features(X, selected_features):
     - X_dropped (DataFrame): DataFrame with the selected features dropped
     """
     X_dropped = X.drop(columns=selected_features)
-    print(f"✅ Dropped Features: {selected_features}")
+    logger.info("✅ Dropped Features: %s", selected_features)
     return X_dropped
 
-from sklearn.ensemble import RandomForestClassifier
-import xgboost as xgb
-import pandas as pd
-import matplotlib.pyplot as plt
-
 def auto_feature_importance(X, y, model_type="random_forest", top_n=10):
     """
     Automatically rank and plot feature importances using models like RandomForest or XGBoost.
@@ -69,9 +69,13 @@ def auto_feature_importance(X, y, model_type="random_forest", top_n=10):
     Returns:
     - feature_importance_df (DataFrame): Features ranked by importance
     """
+    import matplotlib.pyplot as plt
+
     if model_type == "random_forest":
+        from sklearn.ensemble import RandomForestClassifier
         model = RandomForestClassifier(n_estimators=100, random_state=42)
     elif model_type == "xgboost":
+        import xgboost as xgb
         model = xgb.XGBClassifier(n_estimators=100, random_state=42)
     else:
         raise ValueError(f"Unsupported model type: {model_type}")
@@ -98,22 +102,6 @@ def auto_feature_importance(X, y, model_type="random_forest", top_n=10):
 
     return feature_importance_df
 
-# Example usage
-X = df.drop('target', axis=1)
-y = df['target']
-
-# Fit Feature Selector
-selected_features = fit_feature_selector(X, y, method="rfe", k=5)
-
-# Drop the selected features
-X_dropped = drop_selected_features(X, selected_features)
-
-# Auto-Feature Importance using RandomForest
-feature_importance_df = auto_feature_importance(X, y, model_type="random_forest", top_n=10)
-
-print("Feature Importance Rankings:")
-print(feature_importance_df.head(10))
-
 # Extra Tips:
 # Use RandomForest or XGBoost when dealing with large 
 # datasets to automatically detect important features.
@@ -121,5 +109,3 @@ print(feature_importance_df.head(10))
 # you need a more controlled selection based on model performance.
 # SelectKBest is a simpler method based on univariate 
 # feature selection that can work well with small datasets.
-
---------------------------------------------------------
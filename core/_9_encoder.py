@@ -1,86 +1,99 @@
 # >--Encoder.py--<
 
-from sklearn.preprocessing import LabelEncoder
+import pandas as pd
+from utils.parallel import map_columns
+from utils.profiler import profiled
+from utils.logger import get_logger
 
-def fit_label_encoders(df, columns=None):
+logger = get_logger(__name__)
+
+@profiled
+def fit_label_encoders(df, columns=None, workers=None, backend="process"):
     encoders = {}
     if columns is None:
-        columns = df.select_dtypes(include='object').columns
+        columns = df.select_dtypes(include=['object', 'category']).columns
 
-    for col in columns:
-        le = LabelEncoder()
-        df[col] = df[col].astype(str)
-        df[col] = le.fit_transform(df[col])
+    # Each column's encoder is fitted independently, in parallel when workers is set
+    for col, (encoded, le) in map_columns(_fit_label_encoder, df, columns, workers=workers, backend=backend).items():
+        df[col] = encoded
         encoders[col] = le
-        print(f"🔤 LabelEncoder fitted on '{col}'")
+        logger.debug("🔤 LabelEncoder fitted on '%s'", col)
 
     return df, encoders
 
+def _fit_label_encoder(series):
+    from sklearn.preprocessing import LabelEncoder
+    le = LabelEncoder()
+    return le.fit_transform(series.astype(str)), le
+
+@profiled
 def transform_label_encoders(df, encoders):
+    """Encodes each column with its fitted LabelEncoder; labels not seen in fit become -1."""
     for col, le in encoders.items():
         if col in df.columns:
-            df[col] = df[col].astype(str)
-            df[col] = le.transform(df[col])
-            print(f"🔁 Transformed '{col}' using LabelEncoder")
+            df[col] = pd.Index(le.classes_).get_indexer(df[col].astype(str))
+            logger.debug("🔁 Transformed '%s' using LabelEncoder", col)
     return df
 
-from sklearn.preprocessing import OneHotEncoder
-
+@profiled
 def fit_onehot_encoders(df, columns=None):
     if columns is None:
-        columns = df.select_dtypes(include='object').columns
+        columns = df.select_dtypes(include=['object', 'category']).columns
 
+    from sklearn.preprocessing import OneHotEncoder
     ohe = OneHotEncoder(sparse=False, handle_unknown='ignore')
     ohe.fit(df[columns])
-    print(f"🧩 OneHotEncoder fitted on: {columns}")
+    logger.info("🧩 OneHotEncoder fitted on: %s", columns)
     return ohe
 
+@profiled
 def transform_onehot_encoders(df, ohe, columns=None):
     if columns is None:
-        columns = df.select_dtypes(include='object').columns
+        columns = df.select_dtypes(include=['object', 'category']).columns
 
     encoded = ohe.transform(df[columns])
     ohe_df = pd.DataFrame(encoded, columns=ohe.get_feature_names_out(columns), index=df.index)
 
     df = df.drop(columns=columns)
     df = pd.concat([df, ohe_df], axis=1)
-    print(f"🔁 OneHotEncoder applied. Added {len(ohe_df.columns)} columns.")
+    logger.info("🔁 OneHotEncoder applied. Added %s columns.", len(ohe_df.columns))
     return df
 
-from sklearn.preprocessing import OrdinalEncoder
-
+@profiled
 def fit_ordinal_encoders(df, columns_with_order: dict):
     """
     columns_with_order: dict like {'education': ['high school', 'bachelor', 'master', 'phd']}
     """
+    from sklearn.preprocessing import OrdinalEncoder
     oe = OrdinalEncoder(categories=[columns_with_order[col] for col in columns_with_order])
     cols = list(columns_with_order.keys())
     oe.fit(df[cols])
-    print(f"🔢 OrdinalEncoder fitted on: {cols}")
+    logger.info("🔢 OrdinalEncoder fitted on: %s", cols)
     return oe, cols
 
+@profiled
 def transform_ordinal_encoders(df, oe, columns):
     df[columns] = oe.transform(df[columns])
-    print(f"🔁 OrdinalEncoder applied on {columns}")
+    logger.info("🔁 OrdinalEncoder applied on %s", columns)
     return df
 
+@profiled
 def frequency_encoder(df, columns=None):
     """
     Replace categories with their frequency count or proportion.
     """
     if columns is None:
-        columns = df.select_dtypes(include='object').columns
+        columns = df.select_dtypes(include=['object', 'category']).columns
 
     for col in columns:
         freq = df[col].value_counts(normalize=True)
-        df[col] = df[col].map(freq)
-        print(f"📊 Frequency encoding applied on '{col}'")
+        df[col] = df[col].map(freq).astype(float)  # a categorical column would stay categorical
+        logger.debug("📊 Frequency encoding applied on '%s'", col)
     
     return df
 
+@profiled
 def encode_all(df):
     df, label_encoders = fit_label_encoders(df)
     df = frequency_encoder(df)
     return df, label_encoders
-
--------------------------------------------------------------
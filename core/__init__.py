@@ -0,0 +1,47 @@
+"""The pipeline stages, importable as `from core import load_file, cleaning, ...`.
+
+Names are resolved on first access (PEP 562), so importing the package only costs the
+modules actually used: a cleaning job never loads the encoder or scaler modules, and
+their heavy dependencies (scikit-learn, scipy, imblearn, xgboost, matplotlib, seaborn)
+are imported inside the functions that need them. The `pipeline` class is reached as
+core.pipeline.pipeline, since core.pipeline is the module.
+"""
+import importlib
+
+_EXPORTS = {
+    '_1_loader': ['load_file', 'iter_file', 'save_file', 'write_chunks', 'load_from_database',
+                  'iter_from_database', 'filter_after'],
+    '_2_detector': ['datadetector'],
+    '_3_cleaner': ['cleaning'],
+    '_4_standardizer': ['standardizer', 'parse_numeric_strings'],
+    '_5_outlier_handler': ['fit_outlier_bounds', 'outlier_bounds_estimator', 'fit_outlier_bounds_chunks',
+                           'fit_outlier_model', 'outlier_model', 'outlier_mask', 'remove_outliers',
+                           'cap_outliers', 'adaptive_outlier_handling', 'visualize_outliers'],
+    '_6_filler': ['impute_missing_values', 'fit_fill_values', 'transform_fill_values', 'extract_dates'],
+    '_7_dtype_handler': ['enforce_column_types', 'convert_types_as_needed', 'detect_types_proactively',
+                         'optimize_memory'],
+    '_8_feature_selector': ['fit_feature_selector', 'drop_selected_features', 'auto_feature_importance'],
+    '_9_encoder': ['fit_label_encoders', 'transform_label_encoders', 'fit_onehot_encoders',
+                   'transform_onehot_encoders', 'fit_ordinal_encoders', 'transform_ordinal_encoders',
+                   'frequency_encoder', 'encode_all'],
+    '_10_scaler': ['fit_scaler', 'transform_scaler', 'visualize_scaling_effect'],
+    '_11_resampler': ['fit_resampler', 'apply_resampling', 'visualize_class_distribution'],
+    '_12_validator': ['check_final_nans', 'check_invalid_types', 'recheck_outliers', 'visualize_data_distribution'],
+    'pipeline': ['cleaning_pipeline', 'fitted_pipeline'],
+}
+_MODULE_OF = {name: module for module, names in _EXPORTS.items() for name in names}
+
+__all__ = sorted(_MODULE_OF)
+
+
+def __getattr__(name):
+    module = _MODULE_OF.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f"{__name__}.{module}"), name)
+    globals()[name] = value  # later lookups skip __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,332 @@
+import pickle
+import numpy as np
+import pandas as pd
+
+from core._2_detector import datadetector
+from core._3_cleaner import cleaning
+from utils.profiler import profiled, suspended
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Step kinds that only update the pending plan state and never copy data themselves.
+# Consecutive steps of the same stage are fused when the plan is built.
+STAGES = {
+    'rename': 'rename',
+    'drop_columns': 'select',
+    'drop_rows': 'filter',
+    'drop_duplicates': 'filter',
+    'transform': 'transform',
+}
+
+class pipeline:
+    """A lazily built sequence of DataFrame steps.
+
+    Steps are only recorded when added; `run` executes them as a fused plan:
+    - adjacent renames are composed and applied to the column labels once,
+    - adjacent column drops are collected into one list of kept columns,
+    - adjacent row filters and deduplication are merged into one boolean mask,
+    and the kept rows and columns are materialized with a single take, only when a
+    `transform` step needs a concrete frame or the plan ends."""
+
+    def __init__(self):
+        self.steps = []
+
+    def _add(self, kind, func, name):
+        self.steps.append((kind, func, name or getattr(func, '__name__', kind)))
+        return self
+
+    def rename(self, func, name=None):
+        """Record a step that only changes column labels. `func` takes and returns a
+        DataFrame (e.g. `cleaning.convert_to_lowercase`) and is run on the labels alone."""
+        return self._add('rename', func, name)
+
+    def drop_columns(self, predicate, name=None):
+        """Record dropping every column for which `predicate(series)` is True."""
+        return self._add('drop_columns', predicate, name)
+
+    def drop_rows(self, predicate, how='all', name=None):
+        """Record dropping the rows where `predicate(series)` holds for all (or any) columns,
+        like `DataFrame.dropna(how=...)`. `predicate` must return one boolean per row."""
+        if how not in ('all', 'any'):
+            raise ValueError("how must be 'all' or 'any'")
+        reduce = np.logical_and if how == 'all' else np.logical_or
+        return self._add('drop_rows', (predicate, reduce), name)
+
+    def drop_duplicates(self, name='remove_duplicates'):
+        """Record dropping repeated rows, keeping the first occurrence and renumbering the index."""
+        return self._add('drop_duplicates', None, name)
+
+    def transform(self, func, name=None):
+        """Record an arbitrary DataFrame -> DataFrame step. The pending plan is materialized before it runs."""
+        return self._add('transform', func, name)
+
+    def plan(self):
+        """Return the fused execution plan as a list of (stage, [step names])."""
+        stages = []
+        for kind, _, name in self.steps:
+            stage = STAGES[kind]
+            if stages and stages[-1][0] == stage and stage != 'transform':
+                stages[-1][1].append(name)
+            else:
+                stages.append((stage, [name]))
+        return stages
+
+    def rename_labels(self, columns) -> list:
+        """Column labels after every rename step of the plan, position by position."""
+        state = _plan_state(pd.DataFrame(columns=pd.Index(columns, dtype=object)))
+        for kind, func, _ in self.steps:
+            if kind == 'rename':
+                state.rename(func)
+        return list(state.labels)
+
+    def explain(self) -> str:
+        return "\n".join(f"{i}. {stage}: {', '.join(names)}" for i, (stage, names) in enumerate(self.plan(), 1))
+
+    @profiled
+    def run(self, dataframe: pd.DataFrame) -> pd.DataFrame:
+        """Execute the plan on a DataFrame and return the result."""
+        state = _plan_state(dataframe)
+        for kind, func, name in self.steps:
+            if kind == 'transform':
+                state = _plan_state(func(state.materialize()))
+            elif kind == 'rename':
+                state.rename(func)
+            elif kind == 'drop_columns':
+                state.drop_columns(func)
+            elif kind == 'drop_rows':
+                state.drop_rows(*func)
+            else:
+                state.drop_duplicates()
+            if kind != 'rename':  # rename steps print their own name
+                logger.debug("%s", name)
+        dataframe = state.materialize()
+        logger.info("pipeline ✅ %s steps run as %s fused stages", len(self.steps), len(self.plan()))
+        return dataframe
+
+
+class _plan_state:
+    """Pending labels, kept column positions and kept-row mask over one materialized frame."""
+
+    def __init__(self, frame: pd.DataFrame):
+        self.frame = frame
+        self.labels = np.array(frame.columns, dtype=object)
+        self.positions = list(range(frame.shape[1]))
+        self.keep = None
+        self.reset_index = False
+
+    def column(self, position, filtered=False) -> pd.Series:
+        series = self.frame.iloc[:, position]
+        return series[self.keep] if filtered and self.keep is not None else series
+
+    def rename(self, func):
+        current = pd.DataFrame(columns=pd.Index(self.labels[self.positions], dtype=object))
+        with suspended():  # the step only runs on the labels, not as a profiled stage
+            self.labels[self.positions] = np.array(func(current).columns, dtype=object)
+
+    def drop_columns(self, predicate):
+        # Decisions see only the rows kept so far, without materializing the whole frame
+        self.positions = [p for p in self.positions if not predicate(self.column(p, filtered=True))]
+
+    def drop_rows(self, predicate, reduce):
+        matches = [np.asarray(predicate(self.column(p)), dtype=bool) for p in self.positions]
+        # With no columns left, 'all' holds vacuously for every row, as in isnull().all(axis=1)
+        drop = reduce.reduce(matches) if matches else np.full(len(self.frame), reduce is np.logical_and)
+        self.keep = ~drop if self.keep is None else self.keep & ~drop
+
+    def drop_duplicates(self):
+        rows = np.arange(len(self.frame)) if self.keep is None else np.flatnonzero(self.keep)
+        # Fold the columns' factorized codes into one group id per row. NaN/None/NA share
+        # code -1 so they compare equal as in drop_duplicates, and once every kept row has
+        # its own group the remaining columns cannot create duplicates and are skipped.
+        group = np.zeros(len(rows), dtype=np.int64)
+        groups = min(len(rows), 1)
+        for p in self.positions:
+            if groups == len(rows):
+                break
+            codes, uniques = pd.factorize(self.column(p))
+            group, group_ids = pd.factorize(group * (len(uniques) + 1) + codes[rows] + 1)
+            groups = len(group_ids)
+        # Group ids are numbered in order of first appearance, so a row is the first of its
+        # group exactly where the running maximum id increases
+        running_max = np.maximum.accumulate(group) if len(group) else group
+        first = np.diff(running_max, prepend=-1) > 0
+        self.keep = np.zeros(len(self.frame), dtype=bool)
+        self.keep[rows[first]] = True
+        self.reset_index = True
+
+    def materialize(self) -> pd.DataFrame:
+        frame = self.frame
+        if self.keep is not None and not self.keep.all():
+            frame = frame.iloc[np.flatnonzero(self.keep), self.positions]
+        elif len(self.positions) < frame.shape[1]:
+            frame = frame.iloc[:, self.positions]
+        else:
+            frame = frame.copy(deep=False)  # shares the data, new labels stay off the input
+        frame.columns = pd.Index(self.labels[self.positions])
+        if self.reset_index:
+            frame.index = pd.RangeIndex(len(frame))
+        return frame
+
+
+def cleaning_pipeline(cleaner: cleaning = None) -> pipeline:
+    """The steps of `cleaning.run_cleaning` as a lazy, fused pipeline."""
+    cleaner = cleaner or cleaning()
+    return (pipeline()
+            .transform(cleaner.standardize_empty_cells)
+            .rename(cleaner.remove_special_characters)
+            .rename(cleaner.convert_to_lowercase)
+            .rename(cleaner.remove_whitespace)
+            .rename(cleaner.replace_space_with_underscore)
+            .drop_columns(cleaner.is_identifier_column, name='identifier_column_remover')
+            .drop_columns(lambda series: series.isna().all(), name='remove_empty_columns')
+            .drop_rows(pd.isna, how='all', name='remove_empty_rows')
+            .drop_duplicates())
+
+
+ARTIFACT_VERSION = 1
+
+class fitted_pipeline:
+    """Everything the pipeline learns from a training frame, replayed on new batches.
+
+    `fit` runs detection, cleaning and the optional stateful stages once and keeps
+    only their decisions: detected column types, the kept input columns and their
+    cleaned names, the frozen standardizer plan, outlier bounds, fill values, label
+    encoders and the scaler. `transform` applies them to a batch with no refitting
+    and no type re-detection, and `save`/`load` persist them as one artifact."""
+
+    def __init__(self):
+        self.column_types = {}
+        self.source_columns = []  # input columns kept by cleaning, in output order
+        self.columns = []         # their cleaned names
+        self.standardizer = None
+        self.outlier_bounds = None
+        self.outlier_strategy = None
+        self.fill_values = None
+        self.label_encoders = None
+        self.scaler = None
+        self.scale_columns = []
+
+    @classmethod
+    @profiled
+    def fit(cls, dataframe: pd.DataFrame, standardize: bool = False, outlier_method: str = None,
+            outlier_strategy: str = 'cap', impute: str = None, encode: bool = False, scale: str = None):
+        """Fit every stage on a training frame and return the fitted pipeline.
+
+        outlier_method: 'iqr', 'zscore' or 'mad' bounds, applied with outlier_strategy 'cap' or
+            'remove', or an 'isolation_forest' or 'mahalanobis' model (outlier_strategy 'remove')
+        impute: 'mean', 'median' or 'mode' fill values
+        encode: label-encode the remaining text columns
+        scale: 'standard', 'minmax' or 'robust' scaler over the numeric columns"""
+        fitted = cls()
+        # Type detection converts columns in place, so work on a copy of the caller's frame
+        frame, fitted.column_types = datadetector().detect_column_types(dataframe.copy())
+
+        cleaner = cleaning()
+        plan = cleaning_pipeline(cleaner)
+        labels = plan.rename_labels(frame.columns)
+        frame = plan.run(frame)
+        kept = set(frame.columns)
+        for source, label in zip(dataframe.columns, labels):
+            if label in kept and label not in fitted.columns:
+                fitted.source_columns.append(source)
+                fitted.columns.append(label)
+
+        if standardize:
+            from core._4_standardizer import standardizer
+            fitted.standardizer = standardizer()
+            frame = fitted.standardizer.format_all(frame)
+            fitted.standardizer.frozen = True
+
+        if outlier_method:
+            from core._5_outlier_handler import MULTIVARIATE_METHODS, fit_outlier_bounds, fit_outlier_model
+            if outlier_strategy not in ('cap', 'remove'):
+                raise ValueError("outlier_strategy must be 'cap' or 'remove'")
+            if outlier_method in MULTIVARIATE_METHODS:
+                if outlier_strategy == 'cap':
+                    raise ValueError(f"'{outlier_method}' flags whole rows; use outlier_strategy 'remove'")
+                fitted.outlier_bounds = fit_outlier_model(frame, method=outlier_method)
+            else:
+                fitted.outlier_bounds = fit_outlier_bounds(frame, method=outlier_method)
+            fitted.outlier_strategy = outlier_strategy
+            frame = fitted._handle_outliers(frame)
+
+        if impute:
+            from core._6_filler import fit_fill_values, transform_fill_values
+            fitted.fill_values = fit_fill_values(frame, strategy=impute)
+            frame = transform_fill_values(frame, fitted.fill_values)
+
+        if scale:
+            from core._10_scaler import fit_scaler
+            fitted.scale_columns = list(frame.select_dtypes(include='number').columns)
+            if fitted.scale_columns:
+                fitted.scaler = fit_scaler(frame[fitted.scale_columns].astype(float), scaler_type=scale)
+
+        if encode:
+            from core._9_encoder import fit_label_encoders
+            frame, fitted.label_encoders = fit_label_encoders(frame)
+
+        logger.info("fitted_pipeline ✅ %s columns kept from %s", len(fitted.columns), len(dataframe.columns))
+        return fitted
+
+    def _handle_outliers(self, frame: pd.DataFrame) -> pd.DataFrame:
+        from core._5_outlier_handler import cap_outliers, outlier_model, remove_outliers
+        if isinstance(self.outlier_bounds, outlier_model):
+            return remove_outliers(frame, self.outlier_bounds)
+        bounds = {col: bound for col, bound in self.outlier_bounds.items() if col in frame.columns}
+        if self.outlier_strategy == 'cap':
+            return cap_outliers(frame, bounds)
+        return remove_outliers(frame, bounds)
+
+    @profiled
+    def transform(self, dataframe: pd.DataFrame) -> pd.DataFrame:
+        """Apply the fitted decisions to a new batch. Columns unseen at fit time are
+        dropped and missing ones come back empty, so every batch has the fitted schema."""
+        detector = datadetector()
+        frame = dataframe.reindex(columns=self.source_columns)
+        for column in self.source_columns:
+            detector.apply_column_type(frame, column, self.column_types.get(column, 'unknown'))
+
+        frame = cleaning().standardize_empty_cells(frame)
+        frame.columns = self.columns
+        frame = (pipeline()
+                 .drop_rows(pd.isna, how='all', name='remove_empty_rows')
+                 .drop_duplicates()
+                 .run(frame))
+
+        if self.standardizer is not None:
+            frame = self.standardizer.format_all(frame)
+        if self.outlier_bounds is not None:
+            frame = self._handle_outliers(frame)
+        if self.fill_values is not None:
+            from core._6_filler import transform_fill_values
+            frame = transform_fill_values(frame, self.fill_values)
+        if self.scaler is not None:
+            frame[self.scale_columns] = self.scaler.transform(frame[self.scale_columns].astype(float))
+        if self.label_encoders is not None:
+            from core._9_encoder import transform_label_encoders
+            frame = transform_label_encoders(frame, self.label_encoders)
+        return frame
+
+    def transform_chunks(self, chunks):
+        """Apply `transform` to an iterator of DataFrame chunks, yielding each result."""
+        for chunk in chunks:
+            yield self.transform(chunk)
+
+    def save(self, path: str) -> str:
+        """Write the fitted state to `path` as a pickle artifact."""
+        with open(path, 'wb') as handle:
+            pickle.dump({'version': ARTIFACT_VERSION, 'state': self.__dict__}, handle, protocol=pickle.HIGHEST_PROTOCOL)
+        logger.info("fitted_pipeline saved to %s", path)
+        return path
+
+    @classmethod
+    def load(cls, path: str):
+        """Read an artifact written by `save`. Pickle can run code, so only load trusted files."""
+        with open(path, 'rb') as handle:
+            artifact = pickle.load(handle)
+        if artifact.get('version') != ARTIFACT_VERSION:
+            raise ValueError(f"Unsupported pipeline artifact version: {artifact.get('version')}")
+        fitted = cls()
+        fitted.__dict__.update(artifact['state'])
+        return fitted
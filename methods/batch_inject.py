@@ -0,0 +1,154 @@
+"""Clean many files without a GUI.
+
+    python methods/batch_inject.py data/ 'exports/*.csv' extra.xlsx -o cleaned/ -f parquet -w 4
+
+Inputs are files, glob patterns or directories (their supported files, recursively with
+-r). Each file runs through the pipeline in a worker process and is written to the
+output directory as <stem>.<format>; files found under a directory keep their relative
+path. The exit status is 1 when any file fails and 2 on bad arguments, so the script can
+run under cron or a CI job. Nothing here imports tkinter.
+"""
+import os
+import sys
+import glob
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pandas as pd
+
+from core._1_loader import SUPPORTED_FORMATS
+from methods.data_inject import process_file
+from utils.logger import configure_logging, get_logger
+from utils.parallel import WORKERS_ENV, resolve_workers
+
+
+logger = get_logger(__name__)
+
+
+def collect_inputs(patterns, recursive=False) -> list:
+    """Expand files, glob patterns and directories into (file_path, relative_path) pairs.
+    The relative path is what the output is named after: the file name for files and
+    glob matches, the path below the directory for files found in one. Unsupported
+    files inside directories are skipped; an explicit file is kept so it is reported."""
+    inputs = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            walk = glob.iglob(os.path.join(glob.escape(pattern), '**', '*'), recursive=True) if recursive \
+                else glob.iglob(os.path.join(glob.escape(pattern), '*'))
+            for path in sorted(walk):
+                if os.path.isfile(path) and os.path.splitext(path)[1].lower() in SUPPORTED_FORMATS:
+                    inputs.append((path, os.path.relpath(path, pattern)))
+        elif glob.has_magic(pattern):
+            for path in sorted(glob.glob(pattern, recursive=recursive)):
+                if os.path.isfile(path):
+                    inputs.append((path, os.path.basename(path)))
+        elif os.path.exists(pattern):
+            inputs.append((pattern, os.path.basename(pattern)))
+        else:
+            logger.warning("⚠️ No such file or directory: %s", pattern)
+
+    seen, unique = set(), []
+    for path, relative in inputs:
+        key = os.path.realpath(path)
+        if key not in seen:
+            seen.add(key)
+            unique.append((path, relative))
+    return unique
+
+
+def output_path_for(relative_path: str, output_dir: str, output_format: str = None) -> str:
+    """Where a file's cleaned output goes: `relative_path` under `output_dir`, with the
+    extension of `output_format` (the input's own when None)."""
+    stem, ext = os.path.splitext(relative_path)
+    ext = f".{output_format.lstrip('.')}" if output_format else ext
+    return os.path.join(output_dir, stem + ext.lower())
+
+
+def run_file(file_path: str, output_path: str, chunksize=None, optimize=False) -> dict:
+    """Clean one file into `output_path` and describe the outcome; never raises. Only the
+    row count travels back from a worker, not the cleaned frame."""
+    started = time.perf_counter()
+    try:
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+        result = process_file(file_path, chunksize=chunksize, output_path=output_path, optimize=optimize,
+                              raise_errors=True)
+        rows = len(result) if isinstance(result, pd.DataFrame) else None
+        return {'input': file_path, 'output': output_path, 'rows': rows, 'error': None,
+                'seconds': time.perf_counter() - started}
+    except Exception as e:
+        return {'input': file_path, 'output': output_path, 'rows': None, 'error': f"{type(e).__name__}: {e}",
+                'seconds': time.perf_counter() - started}
+
+
+def run_batch(tasks, workers=None, chunksize=None, optimize=False, log_level=None) -> list:
+    """Run `run_file` for each (file_path, output_path) task on a process pool and return
+    the outcomes in task order. Workers configure logging at `log_level` when they start,
+    since a spawned process does not inherit the parent's handlers."""
+    tasks = list(tasks)
+    workers = min(resolve_workers(workers), max(len(tasks), 1))
+    outcomes = {}
+    if workers <= 1:
+        for i, (file_path, output_path) in enumerate(tasks):
+            outcomes[i] = run_file(file_path, output_path, chunksize, optimize)
+            _log_outcome(outcomes[i], len(outcomes), len(tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=configure_logging,
+                                 initargs=(log_level,)) as pool:
+            futures = {pool.submit(run_file, file_path, output_path, chunksize, optimize): i
+                       for i, (file_path, output_path) in enumerate(tasks)}
+            for future in as_completed(futures):
+                outcomes[futures[future]] = future.result()
+                _log_outcome(outcomes[futures[future]], len(outcomes), len(tasks))
+    return [outcomes[i] for i in range(len(tasks))]
+
+
+def _log_outcome(outcome: dict, done: int, total: int):
+    if outcome['error']:
+        logger.error("[%d/%d] ❌ %s: %s", done, total, outcome['input'], outcome['error'])
+    else:
+        logger.info("[%d/%d] ✅ %s → %s (%.2fs)", done, total, outcome['input'], outcome['output'],
+                    outcome['seconds'])
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Clean files, globs or directories without a GUI.")
+    parser.add_argument('inputs', nargs='+', help="files, glob patterns (quoted) or directories")
+    parser.add_argument('-o', '--output-dir', required=True, help="directory the cleaned files are written to")
+    parser.add_argument('-f', '--format', choices=[ext.lstrip('.') for ext in SUPPORTED_FORMATS],
+                        help="output format (default: the input's own)")
+    parser.add_argument('-w', '--workers', type=int,
+                        help=f"worker processes, -1 for every core (default: ${WORKERS_ENV} or 1)")
+    parser.add_argument('-r', '--recursive', action='store_true', help="descend into subdirectories")
+    parser.add_argument('--chunksize', type=int, help="stream each file in chunks of this many rows")
+    parser.add_argument('--optimize', action='store_true', help="shrink dtypes before saving")
+    parser.add_argument('--log-level', help="DEBUG, INFO, WARNING or ERROR (default: $ADCP_LOG_LEVEL or INFO)")
+    args = parser.parse_args(argv)
+
+    configure_logging(args.log_level)
+    log_level = args.log_level or get_logger().level
+    try:
+        resolve_workers(args.workers)
+    except ValueError as e:
+        parser.error(str(e))
+
+    inputs = collect_inputs(args.inputs, args.recursive)
+    if not inputs:
+        parser.error("no input files found")
+    tasks, claimed = [], {}
+    for file_path, relative in inputs:
+        output_path = output_path_for(relative, args.output_dir, args.format)
+        if output_path in claimed:
+            parser.error(f"{file_path} and {claimed[output_path]} would both be written to {output_path}")
+        claimed[output_path] = file_path
+        tasks.append((file_path, output_path))
+
+    outcomes = run_batch(tasks, args.workers, args.chunksize, args.optimize, log_level)
+    failed = [outcome for outcome in outcomes if outcome['error']]
+    logger.info("%d of %d files cleaned, %d failed", len(outcomes) - len(failed), len(outcomes), len(failed))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,67 +2,132 @@ import os
 import sys
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-import tkinter as tk
-from tabulate import tabulate # type: ignore
-from tkinter import filedialog
-from core._1_loader import load_file
+from core._1_loader import load_file, iter_file, save_file, write_chunks
 from core._2_detector import datadetector
 from core._3_cleaner import cleaning
 from core._4_standardizer import standardizer
+from core._7_dtype_handler import optimize_memory
+from core.pipeline import cleaning_pipeline
+from utils.profiler import stage_profiler
+from utils.logger import configure_logging, get_logger, frame_info, frame_preview
+
+
+logger = get_logger(__name__)
 
 
 def select_file():
+    # Imported here so the headless entry points (batch_inject.py) never load Tk
+    import tkinter as tk
+    from tkinter import filedialog
     root = tk.Tk()
     root.withdraw()
     return filedialog.askopenfilename(
         title="Select Data File",
         filetypes=[("CSV files", "*.csv"),
                    ("JSON files", "*.json"),
-                   ("Excel files", "*.xlsx")
+                   ("Excel files", "*.xlsx"),
+                   ("Parquet files", "*.parquet"),
+                   ("Feather/Arrow files", "*.feather *.arrow")
                    ])
 
 
-def process_file(file_path):
-    print(f"Processing file: {file_path}")
+def process_file(file_path, chunksize=None, output_path=None, checkpoint_dir=None, optimize=False,
+                 report_path=None, deep=None, raise_errors=False):
+    """Run the pipeline on a file. output_path saves the final frame in the format of its
+    extension; checkpoint_dir also saves each intermediate stage there as Parquet.
+    optimize shrinks the cleaned frame's dtypes (see optimize_memory) before saving.
+    report_path writes a per-stage timing and memory report (.json or .csv), with the
+    stages named in deep also run under cProfile and tracemalloc (see utils/profiler.py).
+    Errors are logged and None returned, unless raise_errors is set."""
+    if report_path:
+        with stage_profiler(deep=deep) as profiler:
+            result = process_file(file_path, chunksize, output_path, checkpoint_dir, optimize,
+                                  raise_errors=raise_errors)
+        profiler.save(report_path)
+        return result
+
+    logger.info("Processing file: %s", file_path)
+
+    if chunksize:
+        return process_file_chunks(file_path, chunksize, output_path, raise_errors)
 
     try:
         dataframe = load_file(file_path)
-        print("Before detection:")
-        print(dataframe.info())
-        print(dataframe.to_string())
+        logger.debug("Before detection:\n%s\n%s", frame_info(dataframe), frame_preview(dataframe))
 
         detector = datadetector()
         dataframe, column_types = detector.detection(dataframe)
+        save_checkpoint(dataframe, file_path, checkpoint_dir, "detected")
 
-        print("After detection:")
-        print(dataframe.info())
-        print(dataframe.to_string())
+        logger.debug("After detection:\n%s\n%s", frame_info(dataframe), frame_preview(dataframe))
 
         dataframe = run_cleaning(dataframe)
+        save_checkpoint(dataframe, file_path, checkpoint_dir, "cleaned")
         # dataframe = run_standardizer(dataframe)
+        if optimize:
+            dataframe, _ = optimize_memory(dataframe)
+
+        if output_path:
+            save_file(dataframe, output_path)
+            logger.info("Saved cleaned data to %s", output_path)
+        return dataframe
+    except Exception as e:
+        if raise_errors:
+            raise
+        logger.error("Error: %s", e)
+
+
+def save_checkpoint(dataframe, file_path, checkpoint_dir, stage):
+    """Save an intermediate stage as Parquet so it can be reloaded without re-parsing."""
+    if not checkpoint_dir:
+        return
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    checkpoint_path = os.path.join(checkpoint_dir, f"{stem}_{stage}.parquet")
+    save_file(dataframe, checkpoint_path)
+    logger.info("Checkpoint '%s' saved to %s", stage, checkpoint_path)
+
+
+def process_file_chunks(file_path, chunksize, output_path=None, raise_errors=False):
+    """Stream the file through detection and cleaning chunk by chunk, writing each
+    cleaned chunk to output_path as it is produced so memory stays bounded by chunksize."""
+    if output_path is None:
+        stem, ext = os.path.splitext(file_path)
+        output_path = f"{stem}_cleaned{ext}"
+
+    try:
+        chunks = iter_file(file_path, chunksize=chunksize)
+        chunks = datadetector().detection_chunks(chunks)
+        chunks = cleaning().run_cleaning_chunks(chunks)
+        rows_written = write_chunks(chunks, output_path)
+        logger.info("Wrote %s cleaned rows to %s", rows_written, output_path)
+        return output_path
     except Exception as e:
-        print(f"Error: {e}")
+        if raise_errors:
+            raise
+        logger.error("Error: %s", e)
 
 
 def run_cleaning(dataframe):
-    """Apply all cleaning methods from the Cleaning class to the DataFrame."""
-    cleaner = cleaning()
-    dataframe = cleaner.run_cleaning(dataframe)
-    print(dataframe.to_string())
+    """Apply all cleaning methods from the Cleaning class to the DataFrame as one fused,
+    lazily executed plan (see core/pipeline.py)."""
+    dataframe = cleaning_pipeline().run(dataframe)
+    logger.debug("Cleaned:\n%s", frame_preview(dataframe))
     return dataframe
 
 
 def run_standardizer(df):
     standardizer_instance = standardizer()
     df = standardizer_instance.format_all(df)
-    print(df.to_string())  # Preview the standardized DataFrame
+    logger.debug("Standardized:\n%s", frame_preview(df))
     return df
 
 
 def main():
+    configure_logging()
     file_path = select_file()
     if not file_path:
-        print("No file selected. Exiting.")
+        logger.error("No file selected. Exiting.")
         exit(1)
     process_file(file_path)
 
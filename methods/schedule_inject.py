@@ -0,0 +1,283 @@
+import os
+import sys
+import json
+import shutil
+from decimal import Decimal
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pandas as pd
+
+from core._1_loader import (iter_from_database, filter_after, write_chunks, ARROW_FORMATS, DEFAULT_CHUNKSIZE,
+                            _next_part_path)
+from core._2_detector import datadetector
+from core._3_cleaner import cleaning
+from utils.dedup import row_deduplicator
+from utils.logger import configure_logging, get_logger
+
+
+logger = get_logger(__name__)
+
+
+def load_env():
+    """Read settings from a .env file when python-dotenv is installed."""
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        pass
+
+
+def connect():
+    """Open a PostgreSQL connection from the PGHOST, PGPORT, PGDATABASE, PGUSER and
+    PGPASSWORD environment variables."""
+    import psycopg2
+    return psycopg2.connect(
+        host=os.environ.get("PGHOST", "localhost"),
+        port=os.environ.get("PGPORT", "5432"),
+        dbname=os.environ["PGDATABASE"],
+        user=os.environ["PGUSER"],
+        password=os.environ.get("PGPASSWORD", ""),
+    )
+
+
+def process_query(query, connection, output_path, batch_size=DEFAULT_CHUNKSIZE, keyset_column=None):
+    """Stream a query result through detection and cleaning batch by batch, writing each
+    cleaned batch to output_path as it arrives so memory stays bounded by batch_size."""
+    logger.info("Processing query in batches of %s: %s", batch_size, query)
+    chunks = iter_from_database(query, connection, batch_size=batch_size, keyset_column=keyset_column)
+    chunks = datadetector().detection_chunks(chunks)
+    chunks = cleaning().run_cleaning_chunks(chunks)
+    rows_written = write_chunks(chunks, output_path)
+    logger.info("Wrote %s cleaned rows to %s", rows_written, output_path)
+    return rows_written
+
+
+WATERMARK_FILE = "watermarks.json"
+
+
+def load_watermark(source, state_path=WATERMARK_FILE):
+    """Return the stored state of a source (its high-watermark, the schema its first run
+    decided and its committed seen-set), or None before its first run."""
+    if not os.path.exists(state_path):
+        return None
+    with open(state_path, 'r', encoding='utf-8') as handle:
+        entry = json.load(handle).get(source)
+    if entry is not None and entry.get("value_type") == "decimal":
+        entry["value"] = Decimal(entry["value"])
+    return entry
+
+
+def save_watermark(source, column, value, state_path=WATERMARK_FILE, **fields):
+    """Persist a source's high-watermark with its other state, e.g. `columns` and
+    `column_types` (the schema), `dedup` (a seen-set checkpoint) or `pending` (a delta
+    staged for publishing); fields left None are not stored. The state file is replaced
+    atomically, so this one write is what commits a run."""
+    entry = {"column": column, "value": value}
+    entry.update({name: field for name, field in fields.items() if field is not None})
+    _write_state(source, entry, state_path)
+
+
+def _write_state(source, entry, state_path):
+    state = {}
+    if os.path.exists(state_path):
+        with open(state_path, 'r', encoding='utf-8') as handle:
+            state = json.load(handle)
+    entry = {name: field for name, field in entry.items() if name != "value_type"}
+    # NUMERIC/DECIMAL keys: whole values are stored as ints, others as text read back as Decimal
+    if isinstance(entry["value"], Decimal):
+        if entry["value"] == entry["value"].to_integral_value():
+            entry["value"] = int(entry["value"])
+        else:
+            entry["value"], entry["value_type"] = str(entry["value"]), "decimal"
+    state[source] = entry
+
+    temp_path = f"{state_path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as handle:
+        json.dump(state, handle, indent=2)
+    os.replace(temp_path, state_path)
+
+
+def _watermark_value(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat(sep=' ')
+    return value.item() if hasattr(value, 'item') else value
+
+
+def _track_watermark(chunks, column, tracked):
+    # Take the maximum before the batch moves on, later stages may drop the column
+    for chunk in chunks:
+        batch_max = chunk[column].max()
+        if batch_max == batch_max and batch_max is not None:  # skips NaN/NaT when the column is all null
+            batch_max = _watermark_value(batch_max)
+            if tracked.get("value") is None or batch_max > tracked["value"]:
+                tracked["value"] = batch_max
+        yield chunk
+
+
+def _staging_path(output_path):
+    root, ext = os.path.splitext(output_path)
+    return f"{root}.staging{ext}"
+
+
+def _output_extent(output_path):
+    """How far output_path goes: its part files for a dataset directory, else its size in bytes."""
+    if os.path.splitext(output_path)[1].lower() in ARROW_FORMATS:
+        if not os.path.isdir(output_path):
+            return []
+        return sorted(name for name in os.listdir(output_path) if name.startswith('part-'))
+    return os.path.getsize(output_path) if os.path.exists(output_path) else 0
+
+
+def _rollback_output(output_path, extent):
+    """Remove whatever was appended to output_path after `extent` was taken."""
+    if isinstance(extent, list):
+        if os.path.isdir(output_path):
+            for name in os.listdir(output_path):
+                if name.startswith('part-') and name not in extent:
+                    os.remove(os.path.join(output_path, name))
+    elif os.path.exists(output_path) and os.path.getsize(output_path) > extent:
+        os.truncate(output_path, extent)
+
+
+def _aligned_chunks(chunks, output_path):
+    # Staged CSV rows are copied below the output's header, so they take its column order
+    if not output_path.lower().endswith('.csv') or not _output_extent(output_path):
+        yield from chunks
+        return
+    header = list(pd.read_csv(output_path, nrows=0).columns)
+    for chunk in chunks:
+        yield chunk.reindex(columns=header)
+
+
+def _publish(staging_path, output_path):
+    """Append a staged delta to output_path: the next part file of a dataset directory, or
+    the staged file's rows copied to the end of a CSV or JSON file."""
+    ext = os.path.splitext(output_path)[1].lower()
+    if ext in ARROW_FORMATS:
+        os.replace(staging_path, _next_part_path(output_path, ext))
+        return
+    with open(staging_path, 'rb') as staged, open(output_path, 'ab') as output:
+        if ext == '.csv' and output.tell():
+            staged.readline()  # the output already has the header
+        shutil.copyfileobj(staged, output)
+    os.remove(staging_path)
+
+
+def _finish_pending(source, stored, output_path, state_path):
+    """Complete the publish of a run that committed its delta but stopped before the
+    output held all of it, and return the source's state afterwards."""
+    pending = stored.pop("pending")
+    if os.path.exists(pending["staging"]):
+        _rollback_output(output_path, pending["output"])
+        _publish(pending["staging"], output_path)
+        logger.info("Published the delta staged by an interrupted run")
+    _write_state(source, stored, state_path)
+    return stored
+
+
+def process_incremental(query, connection, output_path, watermark_column, source=None,
+                        state_path=WATERMARK_FILE, batch_size=DEFAULT_CHUNKSIZE, keyset_column=None,
+                        dedup_dir=None, dedup_subset=None):
+    """Fetch and clean only the rows whose watermark_column is past the stored high-watermark
+    (a timestamp or monotonically increasing key) and append them to output_path.
+
+    The delta is written to a staging file next to output_path first. One atomic write of
+    the state file then commits it together with the new watermark and seen-set, after
+    which it is appended to the output. A run that fails before that commit leaves the
+    output and state as they were and is retried from the same point on the next tick; one
+    that fails after it has its delta published by the next run before anything else, so
+    each row is appended exactly once. Updated rows are appended as new versions rather
+    than replacing the earlier ones. Rows that share the watermark value but arrive after a
+    run has read it are skipped, so the column should increase strictly.
+
+    The columns kept and the column types detected are decided once, on the first run, and
+    stored with the watermark. Later runs apply that schema rather than deciding again on
+    their few new rows, where a real column can look like an identifier or be all empty,
+    so every append matches the rows already written.
+
+    With dedup_dir, rows (or their dedup_subset columns, by cleaned name) already appended
+    by an earlier run are skipped too; the seen-set there is committed with the watermark."""
+    source = source or query
+    stored = load_watermark(source, state_path)
+    if stored is not None and "pending" in stored:
+        stored = _finish_pending(source, stored, output_path, state_path)
+    params = None
+    if stored is not None:
+        if stored["column"] != watermark_column:
+            raise ValueError(f"Source was tracked on '{stored['column']}', not '{watermark_column}'")
+        query, params = filter_after(query, connection, watermark_column, stored["value"])
+        logger.info("Fetching rows with %s > %s", watermark_column, stored['value'])
+    else:
+        logger.info("No watermark stored for this source yet, fetching all rows")
+
+    tracked = {"value": stored["value"] if stored else None}
+    # Filled in by the first chunk when no schema is stored yet
+    columns = list(stored.get("columns", [])) if stored else []
+    column_types = dict(stored.get("column_types", {})) if stored else {}
+    chunks = iter_from_database(query, connection, batch_size=batch_size, keyset_column=keyset_column, params=params)
+    chunks = _track_watermark(chunks, watermark_column, tracked)
+    chunks = datadetector().detection_chunks(chunks, column_types=column_types)
+    # The seen-set resumes from the last committed run, whatever a failed run added since
+    deduplicator = row_deduplicator(subset=dedup_subset, state_dir=dedup_dir,
+                                    manifest=stored.get("dedup") if stored else None) if dedup_dir else None
+    chunks = cleaning().run_cleaning_chunks(chunks, deduplicator=deduplicator, columns=columns)
+
+    staging_path = _staging_path(output_path)
+    if os.path.exists(staging_path):
+        os.remove(staging_path)  # left by a run that failed before committing
+    rows_written = write_chunks(_aligned_chunks(chunks, output_path), staging_path)
+
+    if tracked["value"] is not None and (stored is None or tracked["value"] != stored["value"]):
+        pending = {"staging": staging_path, "output": _output_extent(output_path)} if rows_written else None
+        save_watermark(source, watermark_column, tracked["value"], state_path, columns=columns or None,
+                       column_types=column_types if columns else None,
+                       dedup=deduplicator.checkpoint() if deduplicator is not None else None, pending=pending)
+        if pending is not None:
+            _finish_pending(source, load_watermark(source, state_path), output_path, state_path)
+        if deduplicator is not None:
+            deduplicator.flush()
+    elif rows_written:
+        logger.warning("%s rows have no %s value to advance the watermark past; nothing was appended",
+                       rows_written, watermark_column)
+        rows_written = 0
+    if os.path.exists(staging_path):
+        os.remove(staging_path)
+    logger.info("Appended %s cleaned rows to %s, watermark at %s", rows_written, output_path, tracked['value'])
+    return rows_written
+
+
+def main():
+    configure_logging()
+    load_env()
+    query = os.environ.get("ADCP_QUERY")
+    if not query:
+        logger.error(">--ADCP_QUERY not set. Exiting.--<")
+        sys.exit(1)
+
+    output_path = os.environ.get("ADCP_OUTPUT", "cleaned_output.parquet")
+    batch_size = int(os.environ.get("ADCP_BATCH_SIZE", DEFAULT_CHUNKSIZE))
+    keyset_column = os.environ.get("ADCP_KEYSET_COLUMN")
+    watermark_column = os.environ.get("ADCP_WATERMARK_COLUMN")
+
+    connection = connect()
+    try:
+        if watermark_column:
+            process_incremental(
+                query,
+                connection,
+                output_path,
+                watermark_column,
+                source=os.environ.get("ADCP_SOURCE"),
+                state_path=os.environ.get("ADCP_STATE_FILE", WATERMARK_FILE),
+                batch_size=batch_size,
+                keyset_column=keyset_column,
+                dedup_dir=os.environ.get("ADCP_DEDUP_DIR"),
+                dedup_subset=os.environ["ADCP_DEDUP_SUBSET"].split(",") if os.environ.get("ADCP_DEDUP_SUBSET") else None,
+            )
+        else:
+            process_query(query, connection, output_path, batch_size=batch_size, keyset_column=keyset_column)
+    finally:
+        connection.close()
+
+if __name__ == "__main__":
+    main()
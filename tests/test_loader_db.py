@@ -0,0 +1,100 @@
+import os
+import sys
+import json
+import types
+import sqlite3
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pandas as pd
+import pytest
+
+from core._1_loader import iter_from_database, filter_after
+from methods.schedule_inject import process_incremental
+
+
+class named_connection(sqlite3.Connection):
+    """A sqlite3 connection reported as a driver with the 'named' paramstyle."""
+
+
+named_connection.__module__ = 'named_driver'
+
+
+@pytest.fixture
+def connection():
+    connection = sqlite3.connect(':memory:')
+    connection.execute("CREATE TABLE orders (id INTEGER, updated INTEGER, item TEXT, qty INTEGER)")
+    _insert(connection, range(1, 11))
+    yield connection
+    connection.close()
+
+
+def _insert(connection, ids):
+    connection.executemany("INSERT INTO orders VALUES (?, ?, ?, ?)",
+                           [(i, 100 + i, f"item {i % 3}", i * 7 % 5) for i in ids])
+    connection.commit()
+
+
+def test_batches_stream_every_row(connection):
+    batches = list(iter_from_database("SELECT * FROM orders ORDER BY id", connection, batch_size=4))
+
+    assert [len(batch) for batch in batches] == [4, 4, 2]
+    assert list(batches[0].columns) == ['id', 'updated', 'item', 'qty']
+    assert pd.concat(batches)['id'].tolist() == list(range(1, 11))
+
+
+def test_batch_size_must_be_positive(connection):
+    with pytest.raises(ValueError):
+        next(iter_from_database("SELECT * FROM orders", connection, batch_size=0))
+
+
+def test_keyset_pages_follow_the_key(connection):
+    batches = list(iter_from_database("SELECT * FROM orders", connection, batch_size=3, keyset_column='id'))
+
+    assert [len(batch) for batch in batches] == [3, 3, 3, 1]
+    assert pd.concat(batches)['id'].tolist() == list(range(1, 11))
+
+
+def test_keyset_pages_over_a_filtered_query(connection):
+    query, params = filter_after("SELECT * FROM orders", connection, 'updated', 104)
+    batches = list(iter_from_database(query, connection, batch_size=4, keyset_column='id', params=params))
+
+    assert [len(batch) for batch in batches] == [4, 2]
+    assert pd.concat(batches)['id'].tolist() == list(range(5, 11))
+
+
+def test_stacked_named_filters_bind_their_own_values(monkeypatch):
+    monkeypatch.setitem(sys.modules, 'named_driver', types.SimpleNamespace(paramstyle='named'))
+    connection = sqlite3.connect(':memory:', factory=named_connection)
+    connection.execute("CREATE TABLE orders (id INTEGER, updated INTEGER)")
+    # Later ids were updated earlier, so the keyset value must not stand in for the watermark
+    connection.executemany("INSERT INTO orders VALUES (?, ?)", [(i, 111 - i) for i in range(1, 11)])
+
+    query, params = filter_after("SELECT * FROM orders", connection, 'updated', 104)
+    batches = list(iter_from_database(query, connection, batch_size=4, keyset_column='id', params=params))
+
+    assert params == {'p1': 104}
+    assert pd.concat(batches)['id'].tolist() == list(range(1, 7))
+    connection.close()
+
+
+def test_incremental_runs_append_only_new_rows(connection, tmp_path):
+    output_path = str(tmp_path / 'orders.csv')
+    state_path = str(tmp_path / 'watermarks.json')
+    run = lambda: process_incremental("SELECT * FROM orders", connection, output_path, 'updated',
+                                      source='orders', state_path=state_path, batch_size=4)
+
+    assert run() == 10
+    with open(state_path, 'r', encoding='utf-8') as handle:
+        stored = json.load(handle)['orders']
+    assert (stored['column'], stored['value']) == ('updated', 110)
+
+    # One new row is appended with the schema of the first run, not re-decided on it alone
+    _insert(connection, [11])
+    assert run() == 1
+    assert run() == 0
+
+    output = pd.read_csv(output_path)
+    assert len(output) == 11
+    assert list(output.columns) == stored['columns']
+    assert output['qty'].iloc[-1] == 11 * 7 % 5
+    assert not os.path.exists(str(tmp_path / 'orders.staging.csv'))
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+
+# Share of distinct values below which a text column is dictionary-encoded as `category`
+CATEGORY_RATIO = 0.05
+
+
+def is_categorical(series: pd.Series) -> bool:
+    return isinstance(series.dtype, pd.CategoricalDtype)
+
+
+def is_low_cardinality(unique_count: int, row_count: int, ratio: float = CATEGORY_RATIO) -> bool:
+    """Whether a column with `unique_count` distinct values over `row_count` rows is worth
+    dictionary-encoding."""
+    return ratio is not None and row_count > 0 and unique_count <= ratio * row_count
+
+
+def dictionary(series: pd.Series):
+    """Split a column into (codes, uniques): its categories for a categorical column, its
+    factorized values otherwise. Missing values have code -1."""
+    if is_categorical(series):
+        return series.cat.codes.to_numpy(), pd.Series(series.cat.categories, dtype=object)
+    codes, uniques = pd.factorize(series)
+    return codes, pd.Series(uniques, dtype=object)
+
+
+def used_categories(series: pd.Series) -> pd.Series:
+    """The categories (or distinct values) that at least one row of a column holds."""
+    codes, uniques = dictionary(series)
+    return uniques[np.bincount(codes[codes >= 0], minlength=len(uniques)) > 0]
+
+
+def map_uniques(series: pd.Series, func) -> pd.Series:
+    """Apply `func` to the distinct values of a column (a Series in, a Series of the same
+    length out) and expand the result back to every row. Missing rows stay missing."""
+    codes, uniques = dictionary(series)
+    mapped = func(uniques).reset_index(drop=True)
+    return pd.Series(mapped.reindex(codes).to_numpy(), index=series.index, name=series.name)
+
+
+def map_categories(series: pd.Series, func) -> pd.Series:
+    """Like map_uniques but keeps the column dictionary-encoded: `func` rewrites the
+    categories, categories that become equal are merged and the codes remapped."""
+    codes, uniques = dictionary(series)
+    mapped = func(uniques).reset_index(drop=True)
+    merged_codes, merged = pd.factorize(mapped)
+    # Code -1 (a missing row) picks the appended -1; categories mapped to a missing value
+    # are factorized to -1 as well
+    codes = np.append(merged_codes, -1)[codes]
+    categories = pd.Index(merged, dtype=object)
+    return pd.Series(pd.Categorical.from_codes(codes, categories), index=series.index, name=series.name)
+
+
+def to_category(series: pd.Series) -> pd.Series:
+    """Dictionary-encode a column as `category` with string categories."""
+    return map_categories(series, lambda uniques: uniques.astype(str))
@@ -0,0 +1,185 @@
+import os
+import json
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_MEMORY_BUDGET = 64 * 1024 * 1024  # bytes of in-memory fingerprints before spilling
+MANIFEST = 'manifest.json'
+
+
+def canonical_view(dataframe: pd.DataFrame) -> pd.DataFrame:
+    """A view of the frame whose values hash equally whenever they are equal, regardless of
+    how each chunk happened to be typed: numeric columns become float64 (so 1 in an int chunk
+    matches 1.0 in a chunk with NaN) and every other column becomes object with None nulls."""
+    columns = {}
+    for i in range(dataframe.shape[1]):
+        series = dataframe.iloc[:, i]
+        if pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype):
+            # -0.0 + 0.0 is 0.0, and every null becomes the same NaN
+            columns[i] = series.astype('float64').to_numpy(na_value=np.nan) + 0.0
+        else:
+            columns[i] = series.astype(object).where(series.notna(), None).to_numpy()
+    return pd.DataFrame(columns, index=dataframe.index)
+
+
+def column_hashes(series: pd.Series) -> np.ndarray:
+    """64-bit hash of every value of one column, over its canonical view."""
+    return pd.util.hash_array(canonical_view(series.to_frame()).iloc[:, 0].to_numpy())
+
+
+def row_fingerprints(dataframe: pd.DataFrame, subset=None) -> np.ndarray:
+    """64-bit fingerprint of every row (or of the `subset` columns of every row)."""
+    if subset is not None:
+        dataframe = dataframe[list(subset)]
+    if dataframe.shape[1] == 0:
+        return np.zeros(len(dataframe), dtype=np.uint64)
+    return pd.util.hash_pandas_object(canonical_view(dataframe), index=False).to_numpy()
+
+
+class row_deduplicator:
+    """Streaming deduplication on 64-bit row fingerprints with bounded memory.
+
+    Fingerprints of the rows kept so far form the seen-set: a sorted in-memory array,
+    written out as a sorted run file once it exceeds `memory_budget` bytes. Runs are
+    memory-mapped and merged block by block as they pile up (each run is at least twice
+    the size of the next), so lookups touch a logarithmic number of files.
+
+    With `state_dir` the seen-set is kept there and `flush` makes it durable, so a later
+    run created on the same directory skips every row an earlier run already kept; without
+    one it lives in a temporary directory removed by `close`. A caller that commits the
+    seen-set together with other state can store `checkpoint()` there instead and pass it
+    back as `manifest`. `subset` restricts the key to some columns. Distinct rows share a
+    fingerprint with probability about n^2 / 2^65."""
+
+    def __init__(self, subset=None, memory_budget=DEFAULT_MEMORY_BUDGET, state_dir=None, manifest=None):
+        self.subset = list(subset) if subset is not None else None
+        self.memory_budget = memory_budget
+        self.persistent = state_dir is not None
+        self.state_dir = state_dir or tempfile.mkdtemp(prefix='adcp_dedup_')
+        os.makedirs(self.state_dir, exist_ok=True)
+        self.recent = np.empty(0, dtype=np.uint64)
+        self.runs = []  # file names, largest first
+        self.committed = set()  # runs of the last flushed or given manifest, kept on disk until replaced
+        self._next_run = 0
+        self._load_manifest(manifest)
+
+    def _load_manifest(self, manifest=None):
+        manifest_path = os.path.join(self.state_dir, MANIFEST)
+        if manifest is None:
+            if not os.path.exists(manifest_path):
+                return
+            with open(manifest_path, 'r', encoding='utf-8') as handle:
+                manifest = json.load(handle)
+        if manifest['subset'] != self.subset:
+            raise ValueError(f"Dedup state in '{self.state_dir}' was keyed on {manifest['subset']}, not {self.subset}")
+        self.runs = list(manifest['runs'])
+        self.committed = set(self.runs)
+        self._next_run = manifest['next_run']
+        # Runs spilled by a run that never committed are not part of the seen-set
+        for name in os.listdir(self.state_dir):
+            if name.endswith('.bin') and name not in self.runs:
+                os.remove(os.path.join(self.state_dir, name))
+
+    def _run(self, name) -> np.ndarray:
+        path = os.path.join(self.state_dir, name)
+        if os.path.getsize(path) == 0:
+            return np.empty(0, dtype=np.uint64)
+        return np.memmap(path, dtype=np.uint64, mode='r')
+
+    def seen(self, fingerprints: np.ndarray) -> np.ndarray:
+        """Boolean mask of the fingerprints already in the seen-set."""
+        mask = np.isin(fingerprints, self.recent, assume_unique=False)
+        for name in self.runs:
+            run = self._run(name)
+            if len(run):
+                positions = np.searchsorted(run, fingerprints)
+                mask |= run[np.minimum(positions, len(run) - 1)] == fingerprints
+        return mask
+
+    def add(self, fingerprints: np.ndarray):
+        """Add fingerprints to the seen-set, spilling to disk once over the memory budget."""
+        self.recent = np.union1d(self.recent, fingerprints)
+        if self.recent.nbytes > self.memory_budget:
+            self._spill()
+
+    def drop_seen(self, dataframe: pd.DataFrame) -> pd.DataFrame:
+        """Drop the rows of a chunk duplicated within it or seen in an earlier chunk or run."""
+        fingerprints = row_fingerprints(dataframe, self.subset)
+        keep = np.zeros(len(fingerprints), dtype=bool)
+        keep[np.unique(fingerprints, return_index=True)[1]] = True
+        keep &= ~self.seen(fingerprints)
+        self.add(fingerprints[keep])
+        return dataframe.loc[keep].reset_index(drop=True)
+
+    def dedup_chunks(self, chunks):
+        """Yield every chunk with the rows seen before removed."""
+        for chunk in chunks:
+            yield self.drop_seen(chunk)
+
+    def _spill(self):
+        name = f"run_{self._next_run:06d}.bin"
+        self._next_run += 1
+        self.recent.tofile(os.path.join(self.state_dir, name))
+        self.runs.append(name)
+        self.recent = np.empty(0, dtype=np.uint64)
+        while len(self.runs) > 1 and self._size(self.runs[-2]) <= 2 * self._size(self.runs[-1]):
+            self._merge_last_runs()
+
+    def _size(self, name) -> int:
+        return os.path.getsize(os.path.join(self.state_dir, name)) // 8
+
+    def _merge_last_runs(self):
+        """Merge the two newest runs into one, a budget-sized block of the older run at a time."""
+        older, newer = self.runs[-2], self.runs[-1]
+        a, b = self._run(older), self._run(newer)
+        name = f"run_{self._next_run:06d}.bin"
+        self._next_run += 1
+        block = max(self.memory_budget // 16, 1)
+        with open(os.path.join(self.state_dir, name), 'wb') as out:
+            start_b = 0
+            for start in range(0, len(a), block):
+                part = a[start:start + block]
+                end_b = int(np.searchsorted(b, part[-1], side='right'))
+                np.union1d(part, b[start_b:end_b]).astype(np.uint64).tofile(out)
+                start_b = end_b
+            for start in range(start_b, len(b), block):  # fingerprints above everything in `a`
+                np.asarray(b[start:start + block]).tofile(out)
+        del a, b
+        self.runs[-2:] = [name]
+        if not self.persistent:
+            self._remove(older, newer)
+        else:
+            self._remove(*(run for run in (older, newer) if run not in self.committed))
+
+    def _remove(self, *names):
+        for name in names:
+            path = os.path.join(self.state_dir, name)
+            if os.path.exists(path):
+                os.remove(path)
+
+    def checkpoint(self) -> dict:
+        """Write the rows kept so far to run files and return the manifest that restores
+        this seen-set, without committing it: the runs it replaces stay on disk until `flush`."""
+        if len(self.recent):
+            self._spill()
+        return {'subset': self.subset, 'runs': list(self.runs), 'next_run': self._next_run}
+
+    def flush(self):
+        """Persist the seen-set to state_dir so later runs skip the rows kept so far."""
+        manifest = self.checkpoint()
+        manifest_path = os.path.join(self.state_dir, MANIFEST)
+        temp_path = f"{manifest_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as handle:
+            json.dump(manifest, handle)
+        os.replace(temp_path, manifest_path)
+        # Runs merged away since the last flush are no longer referenced
+        self._remove(*(name for name in self.committed if name not in self.runs))
+        self.committed = set(self.runs)
+
+    def close(self):
+        """Remove a temporary seen-set; a persistent one is left for the next run."""
+        if not self.persistent:
+            shutil.rmtree(self.state_dir, ignore_errors=True)
@@ -0,0 +1,70 @@
+import os
+import io
+import sys
+import logging
+
+LOGGER_NAME = 'adcp'
+LEVEL_ENV = 'ADCP_LOG_LEVEL'            # e.g. DEBUG for per-column messages and frame previews
+PREVIEW_ROWS_ENV = 'ADCP_PREVIEW_ROWS'  # rows shown by frame previews, 0 disables them
+DEFAULT_PREVIEW_ROWS = 5
+LOG_FORMAT = '%(asctime)s %(levelname)s %(name)s: %(message)s'
+
+
+def get_logger(name: str = None) -> logging.Logger:
+    """The pipeline's logger, or a child of it for a module (pass __name__)."""
+    return logging.getLogger(f"{LOGGER_NAME}.{name}" if name else LOGGER_NAME)
+
+
+def configure_logging(level=None, stream=None, fmt: str = LOG_FORMAT) -> logging.Logger:
+    """Send the pipeline's log records to `stream` (stderr by default) at `level`, or the
+    level named by ADCP_LOG_LEVEL, INFO if unset. Meant for entry points; calling it again
+    replaces the handler instead of adding another one."""
+    logger = get_logger()
+    level = level or os.environ.get(LEVEL_ENV, 'INFO')
+    logger.setLevel(level.upper() if isinstance(level, str) else level)
+    for handler in [h for h in logger.handlers if getattr(h, '_adcp_handler', False)]:
+        logger.removeHandler(handler)
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.setFormatter(logging.Formatter(fmt))
+    handler._adcp_handler = True
+    logger.addHandler(handler)
+    return logger
+
+
+def preview_rows() -> int:
+    return int(os.environ.get(PREVIEW_ROWS_ENV, DEFAULT_PREVIEW_ROWS))
+
+
+class frame_preview:
+    """A capped, lazily rendered view of a DataFrame for log messages: only its first rows
+    (or a random sample of them) are rendered, and only when the record is emitted, e.g.
+    logger.debug("After detection:\\n%s", frame_preview(df)). The full frame is never rendered."""
+
+    def __init__(self, dataframe, rows: int = None, sample: bool = False, random_state: int = 0):
+        self.dataframe = dataframe
+        self.rows = preview_rows() if rows is None else rows
+        self.sample = sample
+        self.random_state = random_state
+
+    def __str__(self):
+        total = len(self.dataframe)
+        if self.rows <= 0:
+            return f"<{total} rows x {self.dataframe.shape[1]} columns, preview disabled>"
+        if self.sample and total > self.rows:
+            shown = self.dataframe.sample(self.rows, random_state=self.random_state).sort_index()
+        else:
+            shown = self.dataframe.head(self.rows)
+        return f"{shown.to_string()}\n[{len(shown)} of {total} rows x {self.dataframe.shape[1]} columns]"
+
+
+class frame_info:
+    """DataFrame.info() for log messages, rendered only when the record is emitted. Memory
+    is the shallow estimate, so object columns are not walked."""
+
+    def __init__(self, dataframe):
+        self.dataframe = dataframe
+
+    def __str__(self):
+        buffer = io.StringIO()
+        self.dataframe.info(buf=buffer, memory_usage=True, show_counts=len(self.dataframe) <= 1_000_000)
+        return buffer.getvalue().rstrip()
@@ -0,0 +1,161 @@
+import io
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+# Default worker count when a stage is not given one; unset or 1 keeps stages serial
+WORKERS_ENV = 'ADCP_WORKERS'
+BACKENDS = ('thread', 'process')
+
+
+def resolve_workers(workers=None) -> int:
+    """Number of workers to use: an explicit count, -1 for every core, or ADCP_WORKERS."""
+    if workers is None:
+        workers = int(os.environ.get(WORKERS_ENV, 1))
+    if workers == -1:
+        workers = os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError("workers must be a positive integer or -1 for all cores")
+    return workers
+
+
+def map_columns(func, dataframe: pd.DataFrame, columns=None, workers=None, backend: str = 'thread') -> dict:
+    """Run `func(series)` for each column and return {column: result} in column order.
+
+    Columns are independent tasks spread over a thread or process pool. Results are
+    collected by column rather than by completion, so the output is identical to the
+    serial run as long as `func` only depends on the column it is given. With the
+    process backend `func` must be picklable (a module-level function, a bound method
+    of a picklable object or a functools.partial of one), and numeric columns reach
+    the workers through shared memory instead of being pickled."""
+    columns = list(dataframe.columns) if columns is None else list(columns)
+    workers = min(resolve_workers(workers), len(columns))
+    if backend not in BACKENDS:
+        raise ValueError(f"backend must be one of {BACKENDS}")
+
+    if workers <= 1:
+        return {column: func(dataframe[column]) for column in columns}
+
+    if backend == 'thread':
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(func, [dataframe[column] for column in columns]))
+        return dict(zip(columns, results))
+
+    blocks = []
+    try:
+        # Share every column before the pool forks, so the workers inherit the parent's
+        # resource tracker instead of starting their own and unlinking the blocks on exit
+        payloads = [_share_column(dataframe[column], blocks) for column in columns]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_run_on_column, func, payload) for payload in payloads]
+            results = [pickle.loads(future.result()) for future in futures]
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+    return dict(zip(columns, results))
+
+
+def _share_column(series: pd.Series, blocks: list):
+    """Describe a column for a worker: numeric numpy columns are copied once into a
+    shared memory block, anything else is pickled with the task."""
+    index = None if isinstance(series.index, pd.RangeIndex) else series.index
+    if not isinstance(series.dtype, np.dtype) or series.dtype.kind not in 'biuf' or series.empty:
+        return ('series', series)
+
+    values = series.to_numpy()
+    block = shared_memory.SharedMemory(create=True, size=values.nbytes)
+    blocks.append(block)
+    np.ndarray(values.shape, dtype=values.dtype, buffer=block.buf)[:] = values
+    return ('shared', block.name, values.dtype.str, len(values), series.name, index)
+
+
+def _run_on_column(func, payload) -> bytes:
+    if payload[0] == 'series':
+        return pickle.dumps(func(payload[1]), protocol=pickle.HIGHEST_PROTOCOL)
+
+    _, name, dtype, length, column, index = payload
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        series = pd.Series(np.ndarray((length,), dtype=np.dtype(dtype), buffer=block.buf),
+                           index=index, name=column, copy=False)
+        # Serialize before detaching so a result that still views the block stays valid
+        result = pickle.dumps(func(series), protocol=pickle.HIGHEST_PROTOCOL)
+        del series
+        return result
+    finally:
+        try:
+            block.close()
+        except BufferError:  # a view outlived the task; the mapping goes with the worker
+            pass
+
+
+def map_partitions(func, partitions, workers=None) -> list:
+    """Run `func(partition)` for each row partition on a process pool, returning the
+    results in partition order. `func` must be picklable."""
+    partitions = list(partitions)
+    workers = min(resolve_workers(workers), max(len(partitions), 1))
+    if workers <= 1:
+        return [func(partition) for partition in partitions]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(func, partitions))
+
+
+def split_rows(dataframe: pd.DataFrame, partitions: int) -> list:
+    """Split a frame into at most `partitions` contiguous row slices."""
+    bounds = np.linspace(0, len(dataframe), max(partitions, 1) + 1).astype(int)
+    return [dataframe.iloc[start:end] for start, end in zip(bounds[:-1], bounds[1:]) if end > start]
+
+
+def csv_byte_ranges(file_path: str, partitions: int) -> list:
+    """Split a CSV file into at most `partitions` (start, end) byte ranges after the header,
+    each beginning and ending on a line boundary. Quoted fields spanning lines are not
+    supported, since a boundary could fall inside one."""
+    size = os.path.getsize(file_path)
+    with open(file_path, 'rb') as handle:
+        handle.readline()  # header
+        offsets = [handle.tell()]
+        for i in range(1, max(partitions, 1)):
+            target = max(offsets[0] + (size - offsets[0]) * i // partitions, offsets[-1])
+            handle.seek(target)
+            if target > offsets[0]:
+                handle.readline()  # move to the start of the next line
+            offsets.append(min(handle.tell(), size))
+    offsets.append(size)
+    return [(start, end) for start, end in zip(offsets[:-1], offsets[1:]) if end > start]
+
+
+def read_csv_range(file_path: str, start: int, end: int) -> pd.DataFrame:
+    """Read the rows of one byte range from `csv_byte_ranges`, using the file's header."""
+    with open(file_path, 'rb') as handle:
+        header = handle.readline()
+        handle.seek(start)
+        body = handle.read(end - start)
+    return pd.read_csv(io.BytesIO(header + body))
+
+
+def first_occurrences(hashes: np.ndarray, workers=None) -> np.ndarray:
+    """Positions of the first row of every distinct hash, in row order.
+
+    Rows are hash-partitioned into one bucket per worker; each bucket is deduplicated
+    on its own in a thread (the numpy sorts release the GIL) since equal hashes always
+    land in the same bucket."""
+    buckets = resolve_workers(workers)
+    bucket_of = hashes % np.uint64(buckets)
+    order = np.argsort(bucket_of, kind='stable')
+    bounds = np.searchsorted(bucket_of[order], np.arange(buckets + 1))
+
+    def bucket_first(bucket):
+        rows = order[bounds[bucket]:bounds[bucket + 1]]
+        return rows[np.unique(hashes[rows], return_index=True)[1]]
+
+    if buckets == 1:
+        firsts = [bucket_first(0)]
+    else:
+        with ThreadPoolExecutor(max_workers=buckets) as pool:
+            firsts = list(pool.map(bucket_first, range(buckets)))
+    return np.sort(np.concatenate(firsts))
@@ -0,0 +1,180 @@
+import io
+import os
+import sys
+import json
+import time
+import pstats
+import cProfile
+import functools
+import contextlib
+import tracemalloc
+
+import pandas as pd
+
+from utils.logger import get_logger
+
+try:
+    import resource
+except ImportError:  # not available on Windows; peak RSS is then left empty
+    resource = None
+
+logger = get_logger(__name__)
+
+REPORT_FIELDS = ['stage', 'depth', 'wall_time', 'cpu_time', 'peak_rss', 'peak_rss_growth',
+                 'rows_in', 'cols_in', 'bytes_in', 'rows_out', 'cols_out', 'bytes_out',
+                 'allocated_peak', 'error', 'profile']
+
+_active = []  # profilers collecting records, innermost last
+
+
+def _peak_rss():
+    """Peak resident set size of the process so far, in bytes."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024  # kilobytes on Linux
+
+
+def _frame_shape(value):
+    """(rows, columns, bytes) of the first DataFrame in a value or tuple of values. Bytes are
+    the frame's own buffers (object columns count their pointers, not the strings)."""
+    values = value if isinstance(value, tuple) else (value,)
+    for item in values:
+        if isinstance(item, pd.DataFrame):
+            return len(item), item.shape[1], int(item.memory_usage(index=True, deep=False).sum())
+    return None, None, None
+
+
+class stage_profiler:
+    """Collects one record per call of every @profiled stage run inside `with stage_profiler():`.
+
+    A record holds the stage's wall and CPU time, the process peak RSS after it and how much
+    the stage raised it, and the rows, columns and bytes of the frame it was given and the one
+    it returned. Stages named in `deep` also run under cProfile and tracemalloc, adding the
+    peak bytes allocated during the stage and the `top` functions by cumulative time. Nested
+    stages are recorded too, with their depth; outer stages include the time of inner ones."""
+
+    def __init__(self, deep=None, top: int = 20):
+        self.deep = {deep} if isinstance(deep, str) else set(deep or [])
+        self.top = top
+        self.records = []
+        self._depth = 0
+        self._deep_running = False
+
+    def __enter__(self):
+        _active.append(self)
+        return self
+
+    def __exit__(self, *exc):
+        _active.remove(self)
+        return False
+
+    def measure(self, stage: str, func, args, kwargs):
+        """Run func(*args, **kwargs) as one recorded call of `stage`."""
+        frame = next((value for value in (*args, *kwargs.values()) if isinstance(value, pd.DataFrame)), None)
+        rows_in, cols_in, bytes_in = _frame_shape(frame)
+        record = {'stage': stage, 'depth': self._depth, 'rows_in': rows_in, 'cols_in': cols_in, 'bytes_in': bytes_in}
+
+        deep = stage in self.deep and not self._deep_running  # cProfile does not nest
+        profiler = cProfile.Profile() if deep else None
+        started_tracing = deep and not tracemalloc.is_tracing()
+        if deep:
+            self._deep_running = True
+            if started_tracing:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            profiler.enable()
+
+        rss_before = _peak_rss()
+        wall, cpu = time.perf_counter(), time.process_time()
+        self._depth += 1
+        result, error = None, None
+        try:
+            result = func(*args, **kwargs)
+            return result
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            self._depth -= 1
+            record['wall_time'] = time.perf_counter() - wall
+            record['cpu_time'] = time.process_time() - cpu
+            record['peak_rss'] = _peak_rss()
+            record['peak_rss_growth'] = record['peak_rss'] - rss_before if rss_before is not None else None
+            record['rows_out'], record['cols_out'], record['bytes_out'] = _frame_shape(result)
+            record['error'] = error
+            if deep:
+                profiler.disable()
+                record['allocated_peak'] = tracemalloc.get_traced_memory()[1]
+                if started_tracing:
+                    tracemalloc.stop()
+                self._deep_running = False
+                stats = io.StringIO()
+                pstats.Stats(profiler, stream=stats).sort_stats('cumulative').print_stats(self.top)
+                record['profile'] = stats.getvalue()
+            self.records.append(record)
+
+    def report(self) -> pd.DataFrame:
+        """Every recorded call, in the order the calls finished."""
+        report = pd.DataFrame(self.records, columns=REPORT_FIELDS)
+        counts = ['depth', 'peak_rss', 'peak_rss_growth', 'rows_in', 'cols_in', 'bytes_in',
+                  'rows_out', 'cols_out', 'bytes_out', 'allocated_peak']
+        report[counts] = report[counts].astype('Int64')  # missing when a stage returns no frame
+        return report
+
+    def summary(self) -> pd.DataFrame:
+        """Calls, total wall and CPU time and largest peak RSS per stage, slowest first."""
+        report = self.report()
+        summary = report.groupby('stage').agg(calls=('stage', 'size'), wall_time=('wall_time', 'sum'),
+                                              cpu_time=('cpu_time', 'sum'), peak_rss=('peak_rss', 'max'))
+        return summary.sort_values('wall_time', ascending=False)
+
+    def to_json(self, path: str) -> str:
+        with open(path, 'w', encoding='utf-8') as handle:
+            json.dump({'stages': self.report().astype(object).where(lambda r: r.notna(), None).to_dict('records')},
+                      handle, indent=2)
+        return path
+
+    def to_csv(self, path: str) -> str:
+        # The cProfile text is multi-line; it is kept out of the CSV
+        self.report().drop(columns=['profile']).to_csv(path, index=False)
+        return path
+
+    def save(self, path: str) -> str:
+        """Write the run report as JSON or CSV, by the path's extension."""
+        ext = os.path.splitext(path)[1].lower()
+        if ext == '.json':
+            self.to_json(path)
+        elif ext == '.csv':
+            self.to_csv(path)
+        else:
+            raise ValueError(f"Unsupported report format: {ext} (use .json or .csv)")
+        logger.info("Run report saved to %s", path)
+        return path
+
+
+def profiled(func=None, name: str = None):
+    """Record every call of a stage function or method in the active stage_profiler, if any.
+    The stage is named after the function's qualified name unless `name` is given."""
+    if func is None:
+        return functools.partial(profiled, name=name)
+    stage = name or func.__qualname__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _active:
+            return func(*args, **kwargs)
+        return _active[-1].measure(stage, func, args, kwargs)
+    return wrapper
+
+
+@contextlib.contextmanager
+def suspended():
+    """Stop recording for the duration of the block, e.g. while a stage only runs on an
+    empty frame to learn its column names."""
+    saved = _active[:]
+    _active.clear()
+    try:
+        yield
+    finally:
+        _active[:] = saved
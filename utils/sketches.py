@@ -0,0 +1,145 @@
+import math
+
+import numpy as np
+
+DEFAULT_K = 200   # quantile sketch accuracy parameter, see quantile_sketch
+SHRINK = 2 / 3    # capacity ratio between a level and the one above it
+
+
+def _as_values(values) -> np.ndarray:
+    """The non-missing values of an array or Series as float64."""
+    values = np.asarray(values, dtype=np.float64).ravel()
+    return values[~np.isnan(values)]
+
+
+class moments:
+    """Count, mean and variance of a stream of numbers in constant memory.
+
+    Each batch is reduced with numpy, then folded in with the pairwise update of Chan et
+    al. (Welford's update generalized to batches). It is stable for any batch size, so
+    chunks of any length can be fed in any order. Two accumulators combine with `merge`,
+    e.g. one per parallel partition. The result matches a single pass over all values up
+    to floating-point rounding."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0  # sum of squared deviations from the mean
+
+    def update(self, values):
+        values = _as_values(values)
+        if len(values):
+            mean = values.mean()
+            self._combine(len(values), mean, float(((values - mean) ** 2).sum()))
+        return self
+
+    def merge(self, other: 'moments'):
+        if other.count:
+            self._combine(other.count, other.mean, other.m2)
+        return self
+
+    def _combine(self, count: int, mean: float, m2: float):
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta ** 2 * self.count * count / total
+        self.count = total
+
+    def variance(self, ddof: int = 1) -> float:
+        return self.m2 / (self.count - ddof) if self.count > ddof else float('nan')
+
+    def std(self, ddof: int = 1) -> float:
+        return math.sqrt(self.variance(ddof))
+
+
+class quantile_sketch:
+    """A KLL quantile sketch (Karnin, Lang and Liberty, 2016) over a stream of numbers.
+
+    Values enter level 0. A level holding more than its capacity is sorted, and every
+    other item is promoted to the next level with twice the weight, from a random first
+    item. Capacities shrink by 2/3 per level below the top one, so the sketch keeps
+    O(k) items however many values it has seen. Sketches built on separate chunks or
+    partitions combine with `merge` into one sketch of all their values.
+
+    Until more than k values are seen the sketch stores all of them, and quantiles are
+    exact and interpolated like pandas. After that, the rank of a returned quantile is
+    within `rank_error()` of the requested rank with 99% confidence: about 1.3% for
+    the default k=200, 0.3% for k=1000. The seed makes the coin flips, and so the
+    results, reproducible."""
+
+    def __init__(self, k: int = DEFAULT_K, seed: int = 0):
+        if k < 8:
+            raise ValueError("k must be at least 8")
+        self.k = k
+        self.levels = [np.empty(0)]
+        self.count = 0
+        self.min = float('inf')
+        self.max = float('-inf')
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level: int) -> int:
+        return max(2, math.ceil(self.k * SHRINK ** (len(self.levels) - 1 - level)))
+
+    def update(self, values):
+        values = _as_values(values)
+        if len(values):
+            self.count += len(values)
+            self.min = min(self.min, float(values.min()))
+            self.max = max(self.max, float(values.max()))
+            self.levels[0] = np.concatenate([self.levels[0], values])
+            self._compress()
+        return self
+
+    def merge(self, other: 'quantile_sketch'):
+        if other.k != self.k:
+            raise ValueError(f"Cannot merge a sketch with k={other.k} into one with k={self.k}")
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.count += other.count
+        self.min, self.max = min(self.min, other.min), max(self.max, other.max)
+        self._compress()
+        return self
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) <= self._capacity(level):
+                level += 1
+                continue
+            if level + 1 == len(self.levels):
+                self.levels.append(np.empty(0))  # capacities below shift, so start over
+            items = np.sort(items)
+            kept, items = items[:len(items) % 2], items[len(items) % 2:]
+            promoted = items[self._rng.integers(2)::2]
+            self.levels[level] = kept
+            self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level = 0
+
+    def rank_error(self) -> float:
+        """Normalized rank error of a single quantile at 99% confidence, 0 while exact."""
+        if len(self.levels) == 1:
+            return 0.0
+        return 2.296 / self.k ** 0.9723  # fitted for KLL by the Apache DataSketches project
+
+    def quantiles(self, qs) -> np.ndarray:
+        qs = np.asarray(qs, dtype=np.float64)
+        if not self.count:
+            return np.full(qs.shape, np.nan)
+        if len(self.levels) == 1:
+            return np.quantile(self.levels[0], qs)
+
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 2 ** i, dtype=np.float64)
+                                  for i, level in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        items, ranks = items[order], np.cumsum(weights[order])
+        positions = np.searchsorted(ranks, qs * ranks[-1], side='left')
+        values = items[np.minimum(positions, len(items) - 1)]
+        # The extremes are tracked exactly
+        return np.where(qs <= 0, self.min, np.where(qs >= 1, self.max, values))
+
+    def quantile(self, q: float) -> float:
+        return float(self.quantiles([q])[0])